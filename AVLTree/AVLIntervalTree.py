@@ -0,0 +1,205 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+from .AVLTree import AVLTree
+from . import AVLTreeMonoid
+
+
+# Keeps the greatest end of each subtree's intervals on its root node
+MAX_END = AVLTreeMonoid.AVLTreeMonoid('max_end', AVLTreeMonoid.MAX.combine, None, lambda key, value: key[1])
+
+
+class AVLIntervalTree():
+    '''
+    AVL tree of half open intervals [start, end), for stabbing and overlap
+    queries.
+
+    Each interval is an entry of an AVLTree keyed by (start, end), so the
+    intervals are ordered by start, and the tree keeps the greatest end of
+    every subtree on its root node as an aggregate, see AVLTree.reduce. A
+    query skips every subtree whose greatest end is not past the query, and
+    every subtree right of a start past the query, so each subtree it enters
+    holds at least one match: a query returning k intervals costs
+    O(log n + k log(n / k)) instead of a scan of the whole tree.
+
+    An interval is held once, adding the same start and end again replaces
+    its value.
+
+    @param <TKey>
+               Generic type of the interval bounds. Must implement <, =, and >.
+    @param <TValue>
+               Generic type representing the data being stored.
+    '''
+
+    def __init__(self):
+        '''Creates a new, empty AVLIntervalTree.'''
+        self._tree = AVLTree(aggregate=MAX_END)
+
+    def __len__(self):
+        '''Returns the number of intervals in the tree.'''
+        return len(self._tree)
+
+    @property
+    def height(self):
+        '''Returns the current height of the tree.'''
+        return self._tree.height
+
+    def add(self, start, end, value=None):
+        '''
+        Adds the interval [start, end), in O(log n).
+
+        @param start
+                   First point in the interval.
+        @param end
+                   First point past the interval.
+        @param value
+                   Value to be stored, replacing the value of the interval if
+                   it is already in the tree.
+
+        @throws ValueError if end is not greater than start.
+        '''
+        if not start < end:
+            raise ValueError(f'! Interval [{start}, {end}) is empty !')
+        self._tree[(start, end)] = value
+
+    def update(self, intervals):
+        '''
+        Adds a batch of intervals, merged into the tree at once, see
+        AVLTree.update.
+
+        @param intervals
+                   Iterable of (start, end, value) triples.
+
+        @throws ValueError if an interval is empty.
+        '''
+        pairs = []
+        for start, end, value in intervals:
+            if not start < end:
+                raise ValueError(f'! Interval [{start}, {end}) is empty !')
+            pairs.append(((start, end), value))
+        self._tree.update(pairs)
+
+    def remove(self, start, end):
+        '''
+        Removes the interval [start, end).
+
+        @return tuple of the start, end and value of the interval removed, or
+                None if the interval is not in the tree.
+        '''
+        removed = self._tree.remove((start, end))
+        return None if removed is None else (start, end, removed[1])
+
+    def get(self, start, end, default_value):
+        '''
+        Gets the value of the interval [start, end).
+
+        @return the value of the interval, or default value if the interval
+                is not in the tree.
+        '''
+        return self._tree.get((start, end), default_value)
+
+    def at(self, point):
+        '''
+        Returns a lazy iterator over the intervals holding point, those with
+        start <= point < end, in ascending order of start.
+
+        @return iterator of (start, end, value) tuples.
+        '''
+        return self._search(self._tree._root, point, point, True, self._tree._version)
+
+    def overlap(self, start, end):
+        '''
+        Returns a lazy iterator over the intervals overlapping [start, end),
+        those with a start less than end and an end greater than start, in
+        ascending order of start. An empty window, with end not greater than
+        start, overlaps nothing; use at for a single point.
+
+        @return iterator of (start, end, value) tuples.
+        '''
+        if not start < end:
+            return iter(())
+        return self._search(self._tree._root, start, end, False, self._tree._version)
+
+    def _search(self, node, low, high, include_high, version):
+        '''
+        Yields, in order, the intervals of the subtree rooted at node that end
+        after low and start before high, or at high if include_high.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        tree = self._tree
+        stack = []
+        while True:
+            # Descend left, skipping the subtrees with no interval ending after low
+            while node is not None and low < node.aggregate:
+                stack.append(node)
+                node = node._left
+            if len(stack) == 0:
+                return
+            if tree._version != version:
+                raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+            node = stack.pop()
+            start, end = node._key
+            if high < start or (start == high and not include_high):
+                # Every interval from here on starts after high
+                return
+            if low < end:
+                yield (start, end, node.value)
+            node = node._right
+
+    def get_min_start(self):
+        '''Returns the least start of an interval in the tree, or None if it is empty.'''
+        key = self._tree.get_min_key()
+        return None if key is None else key[0]
+
+    def get_max_end(self):
+        '''Returns the greatest end of an interval in the tree, or None if it is empty.'''
+        return self._tree.aggregate
+
+    def clear(self):
+        '''Clear the contents of the tree'''
+        self._tree.clear()
+
+    @classmethod
+    def from_sorted(cls, intervals, check=True):
+        '''
+        Creates a new, perfectly balanced AVLIntervalTree from intervals that
+        are already sorted by start, and by end for equal starts, in O(n), see
+        AVLTree.from_sorted.
+
+        @param intervals
+                   Iterable of (start, end, value) triples in ascending order.
+        @param check
+                   If True, verify that the intervals are in strictly
+                   ascending order and not empty.
+
+        @throws ValueError if check is True and the intervals are empty,
+                duplicated or out of order.
+        '''
+        pairs = [((start, end), value) for start, end, value in intervals]
+        if check:
+            for (start, end), value in pairs:
+                if not start < end:
+                    raise ValueError(f'! Interval [{start}, {end}) is empty !')
+        tree = cls()
+        tree._tree = AVLTree.from_sorted(pairs, check, aggregate=MAX_END)
+        return tree
+
+    def __iter__(self):
+        '''Iterates the intervals in ascending order, as (start, end, value) tuples.'''
+        for (start, end), value in self._tree.items():
+            yield (start, end, value)
@@ -0,0 +1,237 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+from itertools import repeat
+from .AVLTree import AVLTree, AVLTreeTraversalMethod
+from . import AVLTreeView
+
+
+class AVLMultiTree():
+    '''
+    AVL tree that holds each key any number of times, as a multimap or, with
+    bag=True, as a multiset.
+
+    Each distinct key is a single AVLTreeNode. In a multimap the node holds
+    the key's values in a list, in the order they were added; in a bag it
+    holds only the number of times the key was added. Adding or discarding
+    a duplicate changes that node in place, in one descent, and never
+    restructures the tree. len() counts every entry, duplicates included.
+
+    @param <TKey>
+               Generic type representing the key used for sorting. Must
+               implement <, =, and >.
+    @param <TValue>
+               Generic type representing the data being stored.
+    '''
+
+    def __init__(self, key=None, bag=False):
+        '''
+        Creates a new, empty AVLMultiTree that defaults to InOrder traversal.
+
+        @param key
+                   Optional key function, see AVLTree.
+        @param bag
+                   If True, keep only a count per key and no values.
+        '''
+        self._tree = AVLTree(key=key)
+        self._bag = bag
+        self._total = 0
+        self.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+
+    def __len__(self):
+        '''Returns the number of entries in the tree, duplicates included.'''
+        return self._total
+
+    @property
+    def unique_count(self):
+        '''Returns the number of distinct keys in the tree.'''
+        return len(self._tree)
+
+    @property
+    def height(self):
+        '''Returns the current height of the tree.'''
+        return self._tree.height
+
+    def add(self, key, value=None):
+        '''
+        Adds an entry for key, in O(log n).
+
+        @param Key
+                   Key used for ordering the tree entries.
+        @param Value
+                   Value to be stored, ignored in a bag.
+        '''
+        node = self._tree._upsert(key, 1 if self._bag else [value])
+        if node is not None:
+            if self._bag:
+                node.value += 1
+            else:
+                node.value.append(value)
+            # The node changed in place, so running iterations must see a change
+            self._tree._version += 1
+        self._total += 1
+
+    def discard_one(self, key):
+        '''
+        Removes one entry for key, the one added last, in O(log n).
+
+        @param Key
+                   Key of the entry to remove.
+        @return True if an entry was removed, False if key is not in the tree.
+        '''
+        node = self._tree._find(key)
+        if node is None:
+            return False
+
+        if self._size(node) == 1:
+            self._tree.remove(key)
+        else:
+            if self._bag:
+                node.value -= 1
+            else:
+                node.value.pop()
+            self._tree._version += 1
+        self._total -= 1
+        return True
+
+    def remove(self, key):
+        '''
+        Removes every entry for key.
+
+        @param Key
+                   Key of the entries to remove.
+        @return the number of entries removed.
+        '''
+        removed = self._tree.remove(key)
+        if removed is None:
+            return 0
+        count = removed[1] if self._bag else len(removed[1])
+        self._total -= count
+        return count
+
+    def count(self, key):
+        '''Returns the number of entries for key, in O(log n).'''
+        node = self._tree._find(key)
+        return 0 if node is None else self._size(node)
+
+    def __getitem__(self, key):
+        '''
+        Gets the values stored for key, in the order they were added.
+
+        @param Key Key to locate in the tree.
+
+        @return list of the values at key, or the count of key in a bag.
+
+        @throws IndexError if key is not in the tree
+        '''
+        node = self._tree._find(key)
+        if node is None:
+            raise IndexError(f'! Key {key} not present in Tree !')
+        return node.value if self._bag else list(node.value)
+
+    def get(self, key, default_value):
+        '''
+        Gets the values stored for key, in the order they were added.
+
+        @param Key Key to locate in the tree.
+
+        @return list of the values at key, or the count of key in a bag, or
+                default value if key is not found.
+        '''
+        node = self._tree._find(key)
+        if node is None:
+            return default_value
+        return node.value if self._bag else list(node.value)
+
+    def get_min_key(self):
+        '''Returns the key with the minimum value.'''
+        return self._tree.get_min_key()
+
+    def get_max_key(self):
+        '''Returns the key with the maximum value'''
+        return self._tree.get_max_key()
+
+    def clear(self):
+        '''Clear the contents of the tree'''
+        self._tree.clear()
+        self._total = 0
+
+    def _size(self, node):
+        '''Returns the number of entries held by node.'''
+        return node.value if self._bag else len(node.value)
+
+    def keys(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the keys, each repeated once per entry.'''
+        return AVLTreeView.AVLTreeView(self, 'keys', order)
+
+    def values(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the values, None for each entry of a bag.'''
+        return AVLTreeView.AVLTreeView(self, 'values', order)
+
+    def items(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the key/value pairs, one per entry.'''
+        return AVLTreeView.AVLTreeView(self, 'items', order)
+
+    def _view_iter(self, kind, order, reverse):
+        '''
+        Returns an iterator for an AVLTreeView, expanding the entries of each
+        node only when the iteration reaches it. Duplicates come in the order
+        they were added, or the opposite order when the keys are descending.
+        '''
+        nodes = self._tree._view_iter('items', order, reverse)
+        descending = (order is AVLTreeTraversalMethod.REVERSE_ORDER) != reverse
+        return self._expand(nodes, kind, descending, self._tree._version)
+
+    def _view_contains(self, kind, item):
+        '''
+        Returns whether an AVLTreeView holds item, with a single lookup of its
+        key. A pair is held if its value is one of the key's values, or None in
+        a bag.
+        '''
+        if kind == 'keys':
+            return self._tree._find(item) is not None
+        if type(item) is not tuple or len(item) != 2:
+            return False
+        node = self._tree._find(item[0])
+        if node is None:
+            return False
+        return item[1] is None if self._bag else item[1] in node.value
+
+    def _expand(self, nodes, kind, descending, version):
+        '''
+        Yields the entries of each key/values pair from nodes.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        tree = self._tree
+        for key, values in nodes:
+            if self._bag:
+                values = repeat(None, values)
+            elif descending:
+                values = reversed(values)
+            for value in values:
+                if tree._version != version:
+                    raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+                if kind == 'keys':
+                    yield key
+                elif kind == 'values':
+                    yield value
+                else:
+                    yield (key, value)
+
+    def __iter__(self):
+        return self._view_iter('items', self.traversal_method, False)
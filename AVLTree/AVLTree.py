@@ -15,28 +15,36 @@ You should have received a copy of the GNU General Public License along with
 the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
 '''
 
-from enum import Enum
+import struct
+import time
+from bisect import bisect_left
+from collections import deque
+from operator import attrgetter, itemgetter
+from . import AVLTreeCodec
+from . import AVLTreeMonoid
 from . import AVLTreeNode
+from . import AVLTreeStats
 from . import AVLTreeInOrderIterator
 from . import AVLTreeReverseOrderIterator
+from . import AVLTreeRangeIterator
+from . import AVLTreeReverseRangeIterator
 from . import AVLTreeTopDownOrderIterator
+from . import AVLTreeView
+from . import AVLTypedTree
+from .AVLTreeTraversalMethod import AVLTreeTraversalMethod
 
-class AVLTreeTraversalMethod(Enum):
-    '''enum used to determine the order of Iteration traversal of an AVLTree.'''
-    IN_ORDER = 1
-    '''Iterates an AVL tree in natural order represented by the Key.'''
+try:
+    import numpy
+except ImportError:  # NumPy is optional, get_many falls back to a tree walk
+    numpy = None
 
-    REVERSE_ORDER = 2
-    '''Iterates an AVL tree in reverse order represented by the Key.'''
 
-    TOP_DOWN = 3
-    '''
-    Iterates an AVL tree in top down order. This iterator traverses the
-    AVLTree in special way that is useful for serializing or saving the tree
-    for the purpose of reloading another tree. Inserting the elements into a
-    tree in the order they are iterated here is the fastest way to load the
-    tree without necessary and costly sorting.
-    '''
+_FILE_MAGIC = b'AVLT'
+_FILE_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sH')
+_FILE_COUNT = struct.Struct('<Q')
+_FIELD_LENGTH = struct.Struct('<I')
+_WRITE_BUFFER_SIZE = 1 << 16
 
 
 class AVLTree():
@@ -51,6 +59,20 @@ class AVLTree():
     the operation. Insertions and deletions may require the tree to be rebalanced
     by one or more tree rotations.
 
+    An optional key function orders the tree by key(k) instead of k, as
+    sorted(key=...) does. It is called once when a key is added, and its result
+    is stored on the node, so descents compare the stored sort keys and never
+    call it again.
+
+    An optional aggregate monoid keeps the aggregate of every subtree on its
+    root node, through inserts, removes and rotations, so reduce answers
+    range sums, minimums, maximums and counts in O(log n).
+
+    An optional max_size bounds the tree: an insert past capacity evicts the
+    minimum or the maximum key in the same call. In ttl mode the keys are
+    expiry timestamps, and every insert also drops the expired keys, all of
+    them with a single split.
+
     @param <TKey>
                Generic type representing the key used for sorting. Must
                implement <, =, and >.
@@ -58,11 +80,83 @@ class AVLTree():
                Generic type representing the data being stored.
     '''
 
-    def __init__(self):
-        '''Creates a new AVLTree that defaults to InOrder traversal.'''
+    def __new__(cls, key=None, key_type=None, **options):
+        '''
+        Creates a new AVLTree. AVLTree(key_type=int) and AVLTree(key_type=float)
+        instead create an AVLTypedTree, which keeps its nodes in typed arrays
+        and supports the core of the AVLTree API.
+
+        @throws ValueError if key_type is combined with any other option, or
+                used with a subclass of AVLTree.
+        '''
+        if key_type is None:
+            return object.__new__(cls)
+        if cls is not AVLTree or key is not None or len(options) > 0:
+            raise ValueError('! key_type can not be combined with other options, or with a subclass of AVLTree !')
+        return AVLTypedTree.AVLTypedTree(key_type)
+
+    def __init__(self, key=None, key_type=None, aggregate=None, max_size=None, evict='min', on_evict=None, clock=None):
+        '''
+        Creates a new AVLTree that defaults to InOrder traversal.
+
+        @param key
+                   Optional function of one argument returning the sort key of
+                   each key. Keys are compared by the sort key alone, so two
+                   keys with the same sort key are the same entry.
+        @param key_type
+                   Optional int or float, see __new__.
+        @param aggregate
+                   Optional AVLTreeMonoid, the name of a built in monoid
+                   ('sum', 'count', 'min' or 'max'), or a (combine, identity)
+                   pair, see reduce.
+        @param max_size
+                   Optional capacity of the tree. An insert that takes the
+                   tree past it evicts the keys chosen by evict.
+        @param evict
+                   'min' or 'max', the end of the key order evicted when the
+                   tree is over capacity, or 'ttl' for ttl mode: the keys are
+                   expiry timestamps, every insert drops the keys less than
+                   clock(), see expire_until, and the soonest expiry is evicted
+                   when the tree is over capacity.
+        @param on_evict
+                   Optional function(key, value) called for each entry evicted
+                   or expired, in key order, once the tree is consistent again.
+        @param clock
+                   Function returning the current timestamp in ttl mode,
+                   time.time by default.
+
+        @throws ValueError if max_size is less than 1 or evict is unknown.
+        '''
+        if evict not in ('min', 'max', 'ttl'):
+            raise ValueError(f'! Unknown eviction policy {evict} !')
+        if max_size is not None and max_size < 1:
+            raise ValueError(f'! max_size must be at least 1, not {max_size} !')
+
         self._root = None
         self._count = 0
         self.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+        self._key_function = key
+        self._monoid = None if aggregate is None else AVLTreeMonoid.as_monoid(aggregate)
+
+        self._max_size = max_size
+        self._evict = evict
+        self._on_evict = on_evict
+        self._clock = None if evict != 'ttl' else time.time if clock is None else clock
+        # True when inserts may have to evict or expire entries
+        self._bounded = max_size is not None or evict == 'ttl'
+
+        # Nodes whose _owner is this token may be changed in place, any other
+        # node is shared with a snapshot and is copied before it is changed.
+        # _shared is False while every node in the tree is known to be owned.
+        self._token = object()
+        self._shared = False
+
+        # Incremented by every change to the structure of the tree, iterators
+        # compare it to detect changes made while they are iterating.
+        self._version = 0
+
+        # (version, (keys, values)) NumPy arrays used by get_many, or None
+        self._arrays = None
 
     def __len__(self):
         '''Returns the number of elements in the tree.'''
@@ -83,6 +177,9 @@ class AVLTree():
         Gets an AVLTreeNode indexed by key. This is the equivalent of an array
         indexer.
 
+        A slice, tree[low:high], returns a lazy iterator over the key/value
+        pairs with low <= key < high, see irange.
+
         @param Key Key to locate in the tree.
 
         @return value of AVLTreeNode at key.
@@ -90,19 +187,15 @@ class AVLTree():
         @throws IndexError if no node exists at key
         '''
 
-        current:AVLTreeNode.AVLTreeNode = self._root
-
-        while current is not None:
-            if current.key == key:
-                return current.value
-
-            if current.key < key:
-                current = current._right
-            else:
-                current = current._left
+        if type(key) is slice:
+            if key.step is not None:
+                raise ValueError('! Slices of an AVLTree do not support a step !')
+            return self.irange(key.start, key.stop)
 
-        #If we are here, then we didn't find key in the tree
-        raise IndexError(f'! Key {key} not present in Tree !')
+        found = self._find(key)
+        if found is None:
+            raise IndexError(f'! Key {key} not present in Tree !')
+        return found.value
 
     def get(self, key, default_value):
         '''
@@ -113,20 +206,149 @@ class AVLTree():
 
         @return value of AVLTreeNode at key, or default value if key is not found.
         '''
+        found = self._find(key)
+        return default_value if found is None else found.value
+
+    def _find(self, key):
+        '''
+        Locates the AVLTreeNode holding key, with one comparison per level:
+        the descent keeps the last node whose key is not greater than key, and
+        a single comparison at the bottom tells whether that node holds key.
+
+        @param Key Key to locate in the tree.
+
+        @return the AVLTreeNode holding key, or None if key is not found.
+        '''
+        key = self._sort_key(key)
 
+        found = None
         current:AVLTreeNode.AVLTreeNode = self._root
 
         while current is not None:
-            if current.key == key:
-                return current.value
-
-            if current.key < key:
+            if key < current._key:
+                current = current._left
+            else:
+                found = current
                 current = current._right
+
+        if found is None or found._key < key:
+            return None
+        return found
+
+    def get_many(self, keys, default_value=None, return_mask=False):
+        '''
+        Gets the values of a batch of keys.
+
+        When NumPy is installed and both the tree keys and the batch are
+        numbers, the batch is resolved with numpy.searchsorted against sorted
+        key and value arrays. The arrays are built on first use and rebuilt
+        only after the tree changes. Otherwise the batch is sorted once and
+        resolved in a single walk of the tree, so the upper levels of the tree
+        are compared against the batch once rather than once per key.
+
+        @param keys
+                   Sequence or NumPy array of keys to locate in the tree.
+        @param default_value
+                   Value returned for keys that are not found.
+        @param return_mask
+                   If True, also return which keys were found.
+
+        @return list of values in the order of keys, or NumPy array if keys
+                is a NumPy array. If return_mask is True, a tuple of the values
+                and a list or array of booleans, True where the key was found.
+        '''
+        is_array = numpy is not None and isinstance(keys, numpy.ndarray)
+
+        if numpy is not None and self._key_function is None and \
+                (self._root is None or type(self._root._key) in (int, float)):
+            query = keys if is_array else numpy.asarray(keys)
+            arrays = None
+            if query.ndim == 1 and query.dtype.kind in 'iuf':
+                arrays = self._numeric_arrays()
+            if arrays is not None:
+                tree_keys, tree_values = arrays
+                positions = numpy.searchsorted(tree_keys, query)
+                if len(tree_keys) == 0:
+                    found = numpy.zeros(len(query), dtype=bool)
+                    values = numpy.full(len(query), default_value)
+                else:
+                    positions = numpy.minimum(positions, len(tree_keys) - 1)
+                    found = tree_keys[positions] == query
+                    values = numpy.where(found, tree_values[positions], default_value)
+                if not is_array:
+                    values = values.tolist()
+                    found = found.tolist()
+                return (values, found) if return_mask else values
+
+        keys = keys.tolist() if is_array else list(keys)
+        if self._key_function is not None:
+            keys = [self._key_function(key) for key in keys]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        sorted_keys = [keys[i] for i in order]
+        values = [default_value] * len(keys)
+        found = [False] * len(keys)
+        self._get_sorted(self._root, sorted_keys, order, 0, len(keys), values, found)
+
+        if is_array:
+            values_array = numpy.empty(len(values), dtype=object)
+            for i, value in enumerate(values):
+                values_array[i] = value
+            values = values_array
+            found = numpy.array(found, dtype=bool)
+        return (values, found) if return_mask else values
+
+    def _get_sorted(self, node, keys, order, low, high, values, found):
+        '''
+        Resolves the sorted batch keys[low:high] against the subtree rooted at
+        node, splitting the batch at each node key.
+
+        @param node root AVLTreeNode of the subtree, or None.
+        @param keys the batch of keys in ascending order.
+        @param order order[i] is the position in the caller's batch of keys[i].
+        @param low index of the first key to resolve.
+        @param high index one past the last key to resolve.
+        @param values list receiving the values, by caller's position.
+        @param found list receiving True for the keys found, by caller's position.
+        '''
+        while node is not None and low < high:
+            split = bisect_left(keys, node._key, low, high)
+            after = split
+            while after < high and keys[after] == node._key:
+                values[order[after]] = node.value
+                found[order[after]] = True
+                after += 1
+
+            self._get_sorted(node._left, keys, order, low, split, values, found)
+            node = node._right
+            low = after
+
+    def _numeric_arrays(self):
+        '''
+        Returns sorted NumPy arrays of the keys and the values of the tree,
+        or None if the keys are not all ints or all floats. The arrays are
+        cached until the tree changes.
+        '''
+        if self._arrays is not None and self._arrays[0] == self._version:
+            return self._arrays[1]
+
+        keys = []
+        values = []
+        for node in self._ordered_nodes(self._version, False):
+            keys.append(node._key)
+            values.append(node.value)
+
+        arrays = None
+        if len(keys) == 0 or AVLTreeCodec.detect_codec(keys) in (AVLTreeCodec.INT64, AVLTreeCodec.FLOAT64):
+            if AVLTreeCodec.detect_codec(values) in (AVLTreeCodec.INT64, AVLTreeCodec.FLOAT64):
+                value_array = numpy.array(values)
             else:
-                current = current._left
+                value_array = numpy.empty(len(values), dtype=object)
+                for i, value in enumerate(values):
+                    value_array[i] = value
+            arrays = (numpy.array(keys), value_array)
 
-        #If we are here, then we didn't find key in the tree
-        return default_value
+        self._arrays = (self._version, arrays)
+        return arrays
 
     def __setitem__(self, key, value):
         '''
@@ -139,58 +361,89 @@ class AVLTree():
                    
         @throws IndexError if key already exists in the tree
         '''
-        
+        found = self._upsert(key, value)
+        if found is not None:
+            found.value = value
+            self._arrays = None
+            if self._monoid is not None:
+                self._reaggregate(found._key)
+            # raise IndexError(f'! Key {key} already exists in Tree !')
+        if self._bounded:
+            self._trim()
+
+    def _upsert(self, key, value):
+        '''
+        Adds a key/value pair if the tree does not hold key yet, in a single
+        descent.
+
+        @return the AVLTreeNode already holding key, owned by this tree so it
+                may be changed in place, or None if the pair was added.
+        '''
+        sort_key = self._sort_key(key)
+
         stack = []
-        node = AVLTreeNode.AVLTreeNode(key, value)
-        
         current = self._root
-        parent = None
+        found = 0
+        go_left = False
         
         stack.append(None)
         
+        # One comparison per level.  found is the depth of the last node whose
+        # key is not greater than sort_key, which is the node holding sort_key
+        # if the tree has one.
         while current is not None:
             stack.append(current)
-            
-            if node.key == current.key:
-                current.value = value
-                return
-                # raise IndexError(f'! Key {key} already exists in Tree !')
-            
-            elif node.key > current.key:
-                # node.key > current.key --> Go Right
-                parent = current
-                current = current._right
-            else:
-                # node.key < current.key --> Go Left
-                parent = current
+            go_left = sort_key < current._key
+            if go_left:
                 current = current._left
+            else:
+                found = len(stack) - 1
+                current = current._right
+                
+        if found > 0 and not stack[found]._key < sort_key:
+            del stack[found + 1:]
+            if self._shared:
+                self._own_path(stack)
+            return stack[-1]
                 
         self._count += 1
+        self._version += 1
+        if self._shared:
+            self._own_path(stack)
+        parent = stack[-1]
+        node = self._new_node(key, value, sort_key)
         
         if parent is None:  # Empty Tree
             self._root = node
             
         else:
-            if node.key > parent.key:
-                # node.key > parent.key, add to right
-                parent._right = node
-            else:
-                # node.key < parent.key, add to left
+            if go_left:
                 parent._left = node
+            else:
+                parent._right = node
                 
         # Go back up the tree and reset height
-        current = stack.pop()
+        self._retrace(stack, 1)
+        return None
+
+    def _reaggregate(self, key):
+        '''
+        Recalculates the aggregates on the path down to the node holding the
+        sort key key, bottom up, after its value was replaced. Every node on
+        the path must be owned by this tree.
+        '''
+        path = []
+        current = self._root
         while current is not None:
-            current._calculate_height()
-            if current.balance_factor > 1:
-                if current._left.balance_factor < 0:
-                    self._rotate_left(current._left, current)
-                self._rotate_right(current, stack[-1])
-            elif current.balance_factor < -1:
-                if current._right.balance_factor > 0:
-                    self._rotate_right(current._right, current)
-                self._rotate_left(current, stack[-1])
-            current = stack.pop()
+            path.append(current)
+            if key < current._key:
+                current = current._left
+            elif current._key < key:
+                current = current._right
+            else:
+                break
+        for node in reversed(path):
+            node._calculate_aggregate()
 
     def remove(self, key):
         '''
@@ -200,27 +453,35 @@ class AVLTree():
                    Key of entry to remove.
         @return tuple representing the key/value pair that was removed.
         '''
+        key = self._sort_key(key)
+
         stack = []
         removed = None
         current = self._root
-        parent = None
+        found = 0
         
         stack.append(None)
         
-        while current is not None and current.key != key:
+        # One comparison per level, as in __setitem__
+        while current is not None:
             stack.append(current)
-            
-            if key > current.key:  # key > current.key --> Go Right
-                parent = current
-                current = current._right
-            else: # key < current.key --> Go Left
-                parent = current
+            if key < current._key:
                 current = current._left
+            else:
+                found = len(stack) - 1
+                current = current._right
                 
-        if current is None:  # Key not found, throw exception?? return None??
+        if found == 0 or stack[found]._key < key:  # Key not found, throw exception?? return None??
             return None
         else:
+            del stack[found + 1:]
+            if self._shared:
+                self._own_path(stack)
+            current = stack.pop()
+            parent = stack[-1]
+
             self._count -= 1
+            self._version += 1
             removed = current
             
             ###
@@ -235,12 +496,11 @@ class AVLTree():
             # maintains the binary search tree property.
             ###
             if current._right is None:
-                if current._left is not None:
-                    stack.append(current._left)
+                # The left subtree moves up unchanged, retracing starts at parent
                 if parent is None:  # deleting the root
                     self._root = current._left
                 else:
-                    if parent.key < current.key:
+                    if parent._right is current:
                         parent._right = current._left
                     else:
                         parent._left = current._left
@@ -256,12 +516,16 @@ class AVLTree():
             # its right child maintains the binary search tree property.
             ###
             elif current._right._left is None:
-                stack.append(current._right)
+                stack.append(self._own_right(current))
                 current._right._left = current._left
+                # The right child takes current's place, retracing compares
+                # against the height current had there
+                current._right.height = current.height
+                current._right.size = current.size
                 if parent is None:  # deleting the root
                     self._root = current._right
                 else:
-                    if parent.key < current.key:
+                    if parent._right is current:
                         parent._right = current._right
                     else:
                         parent._left = current._right
@@ -273,8 +537,8 @@ class AVLTree():
             # replace the deleted node with the right subtree's smallest value.
             ###
             else:
-                lm_parent = current._right
-                leftmost = lm_parent._left
+                lm_parent = self._own_right(current)
+                leftmost = self._own_left(lm_parent)
                 
                 lm_queue = []
                 
@@ -283,8 +547,8 @@ class AVLTree():
                 # Find the leftmost node of current's right node, and its parent.
                 while leftmost._left is not None:
                     lm_queue.append(leftmost)
-                    lm_parent - leftmost
-                    leftmost = lm_parent._left
+                    lm_parent = leftmost
+                    leftmost = self._own_left(lm_parent)
                 
                 # Set the leftmost's parent's left node to the leftmosts right node
                 lm_parent._left = leftmost._right
@@ -296,27 +560,19 @@ class AVLTree():
                 if parent is None:  # deletingthe root
                     self._root = leftmost
                 else:
-                    if parent.key < current.key:
+                    if parent._right is current:
                         parent._right = leftmost
                     else:
                         parent._left = leftmost
                         
+                # leftmost took current's place, and the path down to
+                # lm_parent now hangs below it, in top down order
+                leftmost.height = current.height
+                leftmost.size = current.size
                 stack.append(leftmost)
-                while len(lm_queue) > 0:
-                    stack.append(lm_queue.pop())
+                stack.extend(lm_queue)
             
-            current = stack.pop()
-            while current is not None:
-                current._calculate_height()
-                if current.balance_factor > 1:
-                    if current._left.balance_factor < 0:
-                        self._rotate_left(current._left, current)
-                    self._rotate_right(current, stack[-1])
-                elif current.balance_factor < -1:
-                    if current._right.balance_factor > 0:
-                        self._rotate_right(current._right, current)
-                    self._rotate_left(current, stack[-1])
-                current = stack.pop()
+            self._retrace(stack, -1)
 
             return_value = removed.get_tuple()
             removed._left = None
@@ -324,85 +580,1792 @@ class AVLTree():
             del removed
             return return_value
 
+    def remove_many(self, keys):
+        '''
+        Removes a batch of keys. The batch is sorted once and removed in a
+        single walk of the tree that splits the batch at each node, and each
+        affected subtree is rebalanced once, by a join, instead of once per key.
+        Keys that are not in the tree are ignored.
+
+        @param keys
+                   Iterable of keys to remove.
+        @return list of the key/value pairs that were removed, in key order.
+        '''
+        if self._key_function is not None:
+            keys = map(self._key_function, keys)
+        keys = sorted(keys)
+        removed = []
+        self._root = self._remove_sorted(self._root, keys, 0, len(keys), removed)
+        if len(removed) > 0:
+            self._count -= len(removed)
+            self._version += 1
+        return removed
+
+    def _remove_sorted(self, node, keys, low, high, removed):
+        '''
+        Removes the sorted keys[low:high] from the subtree rooted at node.
+
+        @param node root AVLTreeNode of the subtree, or None.
+        @param keys the batch of keys in ascending order.
+        @param low index of the first key to remove.
+        @param high index one past the last key to remove.
+        @param removed list receiving the removed key/value pairs.
+        @return AVLTreeNode that is the new root of the subtree.
+        '''
+        if node is None or low >= high:
+            return node
+
+        split = bisect_left(keys, node._key, low, high)
+        after = split
+        while after < high and keys[after] == node._key:
+            after += 1
+
+        left = self._remove_sorted(node._left, keys, low, split, removed)
+        if after > split:
+            removed.append(node.get_tuple())
+        right = self._remove_sorted(node._right, keys, after, high, removed)
+
+        if after > split:
+            return self._join_nodes(left, right)
+        return self._join(left, node, right)
+
     def get_min_key(self):
         '''Returns the key with the minimum value.'''
+        current = self._min_node()
+        return None if current is None else current.key
+
+    def get_max_key(self):
+        '''Returns the key with the maximum value'''
+        current = self._max_node()
+        return None if current is None else current.key
+
+    def _min_node(self):
+        '''Returns the AVLTreeNode with the minimum key, or None if the tree is empty.'''
+        current:AVLTreeNode.AVLTreeNode = self._root
+        while current is not None and current._left is not None:
+            current = current._left
+        return current
+
+    def _max_node(self):
+        '''Returns the AVLTreeNode with the maximum key, or None if the tree is empty.'''
+        current:AVLTreeNode.AVLTreeNode = self._root
+        while current is not None and current._right is not None:
+            current = current._right
+        return current
+    
+    def floor(self, key):
+        '''
+        Returns the key/value pair with the greatest key less than or equal to
+        key, or None if there is no such key.
+
+        @param Key Key to search for, it does not need to be present in the tree.
+        '''
+        key = self._sort_key(key)
+
+        found = None
+        current:AVLTreeNode.AVLTreeNode = self._root
+
+        while current is not None:
+            if key < current._key:
+                current = current._left
+            else:
+                found = current
+                current = current._right
+
+        return None if found is None else found.get_tuple()
+
+    def ceiling(self, key):
+        '''
+        Returns the key/value pair with the least key greater than or equal to
+        key, or None if there is no such key.
+
+        @param Key Key to search for, it does not need to be present in the tree.
+        '''
+        key = self._sort_key(key)
+
+        found = None
+        current:AVLTreeNode.AVLTreeNode = self._root
+
+        while current is not None:
+            if current._key < key:
+                current = current._right
+            else:
+                found = current
+                current = current._left
+
+        return None if found is None else found.get_tuple()
+
+    def lower(self, key):
+        '''
+        Returns the key/value pair with the greatest key strictly less than
+        key, or None if there is no such key.
+
+        @param Key Key to search for, it does not need to be present in the tree.
+        '''
+        key = self._sort_key(key)
+
+        found = None
+        current:AVLTreeNode.AVLTreeNode = self._root
+
+        while current is not None:
+            if current._key < key:
+                found = current
+                current = current._right
+            else:
+                current = current._left
+
+        return None if found is None else found.get_tuple()
+
+    def higher(self, key):
+        '''
+        Returns the key/value pair with the least key strictly greater than
+        key, or None if there is no such key.
+
+        @param Key Key to search for, it does not need to be present in the tree.
+        '''
+        key = self._sort_key(key)
+
+        found = None
+        current:AVLTreeNode.AVLTreeNode = self._root
+
+        while current is not None:
+            if key < current._key:
+                found = current
+                current = current._left
+            else:
+                current = current._right
+
+        return None if found is None else found.get_tuple()
+
+    def pop_min(self):
+        '''
+        Removes the entry with the minimum key, in a single descent.
+
+        @return tuple representing the key/value pair that was removed, or
+                None if the tree is empty.
+        '''
+        removed = self._pop_min_node()
+        return None if removed is None else removed.get_tuple()
+
+    def _pop_min_node(self):
+        '''
+        Unlinks the AVLTreeNode with the minimum key from the tree.
+
+        @return the unlinked AVLTreeNode, or None if the tree is empty.
+        '''
         if self._root is None:
             return None
 
-        current:AVLTreeNode.AVLTreeNode = self._root
+        stack = [None]
+        current = self._root
         while current._left is not None:
+            stack.append(current)
             current = current._left
-        return current.key
 
-    def get_max_key(self):
-        '''Returns the key with the maximum value'''
+        if self._shared:
+            stack.append(current)
+            self._own_path(stack)
+            current = stack.pop()
+
+        # The minimum has no left child, replace it with its right subtree
+        if stack[-1] is None:
+            self._root = current._right
+        else:
+            stack[-1]._left = current._right
+        self._count -= 1
+        self._version += 1
+
+        self._retrace(stack, -1)
+        current._right = None
+        current._calculate_height()
+        return current
+
+    def pop_max(self):
+        '''
+        Removes the entry with the maximum key, in a single descent.
+
+        @return tuple representing the key/value pair that was removed, or
+                None if the tree is empty.
+        '''
+        removed = self._pop_max_node()
+        return None if removed is None else removed.get_tuple()
+
+    def _pop_max_node(self):
+        '''
+        Unlinks the AVLTreeNode with the maximum key from the tree.
+
+        @return the unlinked AVLTreeNode, or None if the tree is empty.
+        '''
         if self._root is None:
             return None
 
-        current:AVLTreeNode.AVLTreeNode = self._root
+        stack = [None]
+        current = self._root
         while current._right is not None:
+            stack.append(current)
             current = current._right
-        return current.key
-    
-    def clear(self):
-        '''Clear the contents of the tree'''
-        self._root = None
-        self._count = 0
-        
-    def _rotate_right(self, node, parent):
+
+        if self._shared:
+            stack.append(current)
+            self._own_path(stack)
+            current = stack.pop()
+
+        # The maximum has no right child, replace it with its left subtree
+        if stack[-1] is None:
+            self._root = current._left
+        else:
+            stack[-1]._right = current._left
+        self._count -= 1
+        self._version += 1
+
+        self._retrace(stack, -1)
+        current._left = None
+        current._calculate_height()
+        return current
+
+    def expire_until(self, key):
         '''
-        AVL Function to to rotate right at a given node, with a given parent.
-             used in the balancing algorithm.
-        
-        @param *node pointer to AVLTreeNode to rotate
-        @param *parent pointer to AVLTreeNode of the parent to *node
-                  if parent is None, the parent is _root
+        Removes every entry with a key less than key with a single split, in
+        O(log n), plus one on_evict call per entry removed.
+
+        @param Key
+                   Key to expire up to, it does not need to be present in the
+                   tree. In ttl mode, the current timestamp.
+        @return the number of entries removed.
         '''
-        left_node = node._left
-        node._left = left_node._right
-        left_node._right = node
-        
-        node._calculate_height()
-        left_node._calculate_height()
-        
-        if parent is None:
-            self._root = left_node
+        return self._expire_before(self._sort_key(key))
+
+    def expire(self):
+        '''
+        Removes every entry whose expiry timestamp is less than clock(), see
+        expire_until. Inserts already do this, call it to expire entries
+        while nothing is being inserted.
+
+        @return the number of entries removed.
+
+        @throws ValueError if the tree is not in ttl mode.
+        '''
+        if self._clock is None:
+            raise ValueError('! AVL Tree is not in ttl mode !')
+        return self._expire_before(self._sort_key(self._clock()))
+
+    def _trim(self):
+        '''Drops the expired entries in ttl mode, then evicts the entries past max_size.'''
+        if self._clock is not None:
+            minimum = self._min_node()
+            if minimum is not None:
+                now = self._sort_key(self._clock())
+                if minimum._key < now:
+                    self._expire_before(now)
+        if self._max_size is not None and self._count > self._max_size:
+            self._evict_excess()
+
+    def _expire_before(self, key):
+        '''
+        Cuts the entries with sort keys less than key out of the tree.
+
+        @return the number of entries removed.
+        '''
+        if self._root is None or not self._min_node()._key < key:
+            return 0
+        expired, self._root = self._split(self._root, key)
+        self._version += 1
+        self._count -= expired.size
+        self._arrays = None
+        self._evicted(expired)
+        return expired.size
+
+    def _evict_excess(self):
+        '''
+        Evicts the entries past max_size from the end of the key order chosen
+        by evict. A single entry is popped, more are cut out with one split.
+        '''
+        excess = self._count - self._max_size
+        from_max = self._evict == 'max'
+        if excess == 1:
+            node = self._pop_max_node() if from_max else self._pop_min_node()
+            if self._on_evict is not None:
+                self._on_evict(node.key, node.value)
+            return
+
+        if from_max:
+            kept, evicted = self._split(self._root, self._node_at(self._count - excess)._key)
         else:
-            if left_node.key < parent.key:
-                parent._left = left_node
-            else:
-                parent._right = left_node    
-                
-    def _rotate_left(self, node, parent):
+            evicted, kept = self._split(self._root, self._node_at(excess)._key)
+        self._root = kept
+        self._count -= excess
+        self._version += 1
+        self._arrays = None
+        self._evicted(evicted)
+
+    def _evicted(self, node):
+        '''Calls on_evict for each entry of the subtree rooted at node, cut out of the tree, in key order.'''
+        if self._on_evict is None:
+            return
+        for key, value in AVLTree._detached_items(node):
+            self._on_evict(key, value)
+
+    @staticmethod
+    def _detached_items(node):
         '''
-        AVL Function to to rotate left at a given node, with a given parent.
-             used in the balancing algorithm.
-        
-        @param *node pointer to AVLTreeNode to rotate
-        @param *parent pointer to AVLTreeNode of the parent to *node
-                 if parent is None, the parent is _root
+        Yields the key/value pairs of the subtree rooted at node in key order.
+        The subtree must be cut out of the tree, so nothing changes it.
         '''
-        right_node = node._right
-        node._right = right_node._left
-        right_node._left = node
-        
+        stack = []
+        while node is not None or len(stack) > 0:
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            node = stack.pop()
+            yield node.get_tuple()
+            node = node._right
+
+    def remove_range(self, low=None, high=None, inclusive=(True, False), return_items=False):
+        '''
+        Removes every entry with a key between low and high. The range is cut
+        out with two splits and the rest rejoined, in O(log n) however many
+        entries it holds, instead of a descent and a retrace per key.
+
+        del tree[low:high] is remove_range(low, high).
+
+        @param low
+                   Lower bound of the range, None for no lower bound.
+        @param high
+                   Upper bound of the range, None for no upper bound.
+        @param inclusive
+                   Pair of booleans, whether low and high are included in the
+                   range. Defaults to low <= key < high, as in irange.
+        @param return_items
+                   If True, also return a lazy iterator over the removed
+                   key/value pairs, in key order.
+
+        @return the number of entries removed, or a tuple of the number and
+                the iterator if return_items is True.
+        '''
+        low = None if low is None else self._sort_key(low)
+        high = None if high is None else self._sort_key(high)
+        include_low, include_high = inclusive
+
+        # Find the least key in the range, the tree is left untouched when the
+        # range is empty
+        first = None
+        current:AVLTreeNode.AVLTreeNode = self._root
+        while current is not None:
+            if low is not None and (current._key < low if include_low else not low < current._key):
+                current = current._right
+            else:
+                first = current
+                current = current._left
+        if first is None or (high is not None and (high < first._key if include_high else not first._key < high)):
+            return (0, iter(())) if return_items else 0
+
+        left, rest = (None, self._root) if low is None else self._split(self._root, low, not include_low)
+        removed, right = (rest, None) if high is None else self._split(rest, high, include_high)
+        self._root = self._join_nodes(left, right)
+
+        count = removed.size
+        self._count -= count
+        self._version += 1
+        self._arrays = None
+        if return_items:
+            return (count, AVLTree._detached_items(removed))
+        return count
+
+    def __delitem__(self, key):
+        '''
+        Removes the entry at key. A slice, del tree[low:high], removes the
+        entries with low <= key < high, see remove_range.
+
+        @throws IndexError if no node exists at key
+        '''
+        if type(key) is slice:
+            if key.step is not None:
+                raise ValueError('! Slices of an AVLTree do not support a step !')
+            self.remove_range(key.start, key.stop)
+        elif self.remove(key) is None:
+            raise IndexError(f'! Key {key} not present in Tree !')
+
+    def irange(self, low=None, high=None, inclusive=(True, False), reverse=False):
+        '''
+        Returns a lazy iterator over the key/value pairs with keys between low
+        and high. The iterator seeks directly to the first key in the range, so
+        a range of k entries costs O(log n + k).
+
+        @param low
+                   Lower bound of the range, None for no lower bound.
+        @param high
+                   Upper bound of the range, None for no upper bound.
+        @param inclusive
+                   Pair of booleans, whether low and high are included in the
+                   range. Defaults to low <= key < high.
+        @param reverse
+                   If True, iterate from high down to low.
+
+        @return iterator of key/value tuples.
+        '''
+        low = None if low is None else self._sort_key(low)
+        high = None if high is None else self._sort_key(high)
+        if reverse:
+            return AVLTreeReverseRangeIterator.AVLTreeReverseRangeIterator(self._root, low, high, inclusive, self)
+        return AVLTreeRangeIterator.AVLTreeRangeIterator(self._root, low, high, inclusive, self)
+
+    def rank(self, key):
+        '''
+        Returns the number of keys in the tree that are less than key. If key
+        is in the tree, this is its zero based position in natural order.
+        Runs in O(log n).
+
+        @param Key Key to rank, it does not need to be present in the tree.
+        '''
+        key = self._sort_key(key)
+
+        rank = 0
+        current:AVLTreeNode.AVLTreeNode = self._root
+
+        while current is not None:
+            if current._key < key:
+                rank += 1 if current._left is None else current._left.size + 1
+                current = current._right
+            else:
+                current = current._left
+
+        return rank
+
+    @property
+    def aggregate(self):
+        '''
+        Returns the aggregate of every entry in the tree, or the identity of
+        the monoid if the tree is empty.
+
+        @throws ValueError if the tree was created without an aggregate.
+        '''
+        if self._monoid is None:
+            raise ValueError('! AVL Tree was created without an aggregate !')
+        return self._monoid.identity if self._root is None else self._root.aggregate
+
+    def reduce(self, low=None, high=None, inclusive=(True, False)):
+        '''
+        Returns the aggregate of the entries with keys between low and high, in
+        O(log n). The range is split where the search paths for low and high
+        part, and the aggregates of the whole subtrees hanging inside the range
+        off each path are combined, so no entry is visited one by one.
+
+        The aggregates follow every insert, remove and [] = on the tree, but
+        not changes made inside a mutable value; set the value again after
+        changing it in place.
+
+        @param low
+                   Lower bound of the range, None for no lower bound.
+        @param high
+                   Upper bound of the range, None for no upper bound.
+        @param inclusive
+                   Pair of booleans, whether low and high are included in the
+                   range. Defaults to low <= key < high, as in irange.
+
+        @return the aggregate of the range, or the identity of the monoid if
+                the range is empty.
+
+        @throws ValueError if the tree was created without an aggregate.
+        '''
+        monoid = self._monoid
+        if monoid is None:
+            raise ValueError('! AVL Tree was created without an aggregate !')
+        low = None if low is None else self._sort_key(low)
+        high = None if high is None else self._sort_key(high)
+        include_low, include_high = inclusive
+        combine = monoid.combine
+        lift = monoid.lift
+
+        def above_low(key):
+            return low is None or (not key < low if include_low else low < key)
+
+        def below_high(key):
+            return high is None or (not high < key if include_high else key < high)
+
+        # Descend to the highest node inside the range
+        split:AVLTreeNode.AVLTreeNode = self._root
+        while split is not None:
+            if not above_low(split._key):
+                split = split._right
+            elif not below_high(split._key):
+                split = split._left
+            else:
+                break
+        if split is None:
+            return monoid.identity
+
+        # Left of split every key is below high, each node above low brings
+        # itself and its whole right subtree, which precede what came before
+        result = lift(split._original_key, split.value)
+        current = split._left
+        while current is not None:
+            if above_low(current._key):
+                if current._right is not None:
+                    result = combine(current._right.aggregate, result)
+                result = combine(lift(current._original_key, current.value), result)
+                current = current._left
+            else:
+                current = current._right
+
+        # Right of split every key is above low, each node below high brings
+        # its whole left subtree and itself, which follow what came before
+        current = split._right
+        while current is not None:
+            if below_high(current._key):
+                if current._left is not None:
+                    result = combine(result, current._left.aggregate)
+                result = combine(result, lift(current._original_key, current.value))
+                current = current._right
+            else:
+                current = current._left
+
+        return result
+
+    def select(self, index):
+        '''
+        Returns the key at a zero based position in natural order, so
+        select(0) is the minimum key. Negative positions count back from the
+        end, as in a list. Runs in O(log n).
+
+        @param index Position of the key.
+
+        @throws IndexError if index is out of range
+        '''
+        return self._node_at(index).key
+
+    def peekitem(self, index=-1):
+        '''
+        Returns the key/value pair at a zero based position in natural order.
+        Negative positions count back from the end, as in a list, and the
+        default returns the pair with the maximum key. Runs in O(log n).
+
+        @param index Position of the pair.
+
+        @return tuple representing the key/value pair at index.
+
+        @throws IndexError if index is out of range
+        '''
+        return self._node_at(index).get_tuple()
+
+    def _node_at(self, index):
+        '''
+        Locates the AVLTreeNode at a zero based position in natural order,
+        using the subtree sizes.
+
+        @param index Position of the node, negative positions count back
+               from the end.
+
+        @throws IndexError if index is out of range
+        '''
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError(f'! Index {index} out of range !')
+
+        current:AVLTreeNode.AVLTreeNode = self._root
+        while True:
+            left_size = 0 if current._left is None else current._left.size
+            if index < left_size:
+                current = current._left
+            elif index == left_size:
+                return current
+            else:
+                index -= left_size + 1
+                current = current._right
+
+    def split(self, key):
+        '''
+        Splits the tree at key into two trees, in O(log n). The nodes are moved,
+        not copied, so this tree is left empty.
+
+        @param Key
+                   Key to split at, it does not need to be present in the tree.
+        @return tuple of two AVLTrees, the first holding the keys less than
+                key, the second holding the keys greater than or equal to key.
+        '''
+        left_root, right_root = self._split(self._root, self._sort_key(key))
+        left = self._new_tree(left_root)
+        right = self._new_tree(right_root)
+        # The halves hold disjoint nodes, so both may keep changing them in
+        # place under this tree's token
+        for half in (left, right):
+            half._token = self._token
+            half._shared = self._shared
+        self.clear()
+        return (left, right)
+
+    @staticmethod
+    def join(left, right, middle=None):
+        '''
+        Joins two trees into one, in O(log n). Every key in left must be less
+        than every key in right. The nodes are moved, not copied, so left and
+        right are left empty.
+
+        @param left
+                   AVLTree holding the lesser keys.
+        @param right
+                   AVLTree holding the greater keys.
+        @param middle
+                   Optional key/value pair to add between left and right, its
+                   key must be greater than the keys in left and less than the
+                   keys in right.
+        @return new AVLTree holding the entries of both trees.
+
+        @throws ValueError if the keys of left and right overlap, or the trees
+                sort with different key functions or keep different aggregates.
+        '''
+        if left._key_function != right._key_function:
+            raise ValueError('! Trees being joined must sort with the same key function !')
+        if left._monoid != right._monoid:
+            raise ValueError('! Trees being joined must keep the same aggregate !')
+        if middle is not None:
+            node = left._new_node(middle[0], middle[1], left._sort_key(middle[0]))
+            if (left._root is not None and not left._max_node()._key < node._key) or \
+                    (right._root is not None and not node._key < right._min_node()._key):
+                raise ValueError(f'! Middle key {node.key} is not between the trees being joined !')
+        elif left._root is not None and right._root is not None:
+            if not left._max_node()._key < right._min_node()._key:
+                raise ValueError('! Keys of the trees being joined overlap !')
+            node = right._pop_min_node()
+        else:
+            node = None
+
+        if node is None:
+            source = left if right._root is None else right
+            tree = left._new_tree(source._root)
+            tree._token = source._token
+            tree._shared = source._shared
+        else:
+            # After a split both halves own their nodes with the same token,
+            # and a snapshot of either half still shares them, so the joined
+            # tree takes a fresh token: it copies every node before changing it.
+            left._token = object()
+            left._shared = True
+            tree = left._new_tree(left._join(left._root, node, right._root))
+            tree._token = left._token
+            tree._shared = True
+        left.clear()
+        right.clear()
+        if tree._bounded:
+            tree._trim()
+        return tree
+
+    def snapshot(self):
+        '''
+        Returns a snapshot of the tree in O(1). The snapshot is a complete
+        AVLTree that shares all of its nodes with this tree. Nodes are never
+        changed in place while they are shared; the next write to either tree
+        copies only the O(log n) nodes on the path to the change, so neither
+        tree ever sees the other's changes. Readers can iterate a snapshot
+        while a writer keeps changing the live tree.
+        '''
+        snapshot = self._new_tree(self._root)
+        snapshot._token = object()
+        snapshot._shared = True
+        self._token = object()
+        self._shared = True
+        return snapshot
+
+    def copy(self):
+        '''
+        Returns a new tree with the same entries and the same shape as this
+        one. The values themselves are not copied.
+        '''
+        tree = self._new_tree()
+        tree._root = tree._copy_subtree(self._root)
+        tree._count = self._count
+        return tree
+
+    def union(self, other, resolve=None):
+        '''
+        Returns a new tree holding the entries of this tree and other.
+
+        @param other
+                   AVLTree to combine with this one.
+        @param resolve
+                   Optional function(key, value, other_value) returning the
+                   value to keep when key is in both trees. By default the
+                   value from other wins, as in dict.update.
+        '''
+        other = self._in_same_order(other)
+        tree = self.snapshot()
+        tree._root = tree._union(tree._root, other._root, resolve)
+        tree._count = 0 if tree._root is None else tree._root.size
+        if tree._bounded:
+            tree._trim()
+        return tree
+
+    def intersection(self, other, resolve=None):
+        '''
+        Returns a new tree holding the entries whose keys are in both this
+        tree and other.
+
+        @param other
+                   AVLTree to intersect with this one.
+        @param resolve
+                   Optional function(key, value, other_value) returning the
+                   value to keep. By default the value from other wins.
+        '''
+        other = self._in_same_order(other)
+        tree = self.snapshot()
+        tree._root = tree._intersection(tree._root, other._root, resolve)
+        tree._count = 0 if tree._root is None else tree._root.size
+        return tree
+
+    def difference(self, other):
+        '''
+        Returns a new tree holding the entries of this tree whose keys are not
+        in other.
+
+        @param other AVLTree holding the keys to leave out.
+        '''
+        other = self._in_same_order(other)
+        tree = self.snapshot()
+        tree._root = tree._difference(tree._root, other._root)
+        tree._count = 0 if tree._root is None else tree._root.size
+        return tree
+
+    def symmetric_difference(self, other):
+        '''
+        Returns a new tree holding the entries whose keys are in exactly one
+        of this tree and other.
+
+        @param other AVLTree to combine with this one.
+        '''
+        other = self._in_same_order(other)
+        tree = self.snapshot()
+        tree._root = tree._symmetric_difference(tree._root, other._root)
+        tree._count = 0 if tree._root is None else tree._root.size
+        if tree._bounded:
+            tree._trim()
+        return tree
+
+    def __or__(self, other):
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        return self.union(other)
+
+    def __and__(self, other):
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        return self.difference(other)
+
+    def __xor__(self, other):
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        return self.symmetric_difference(other)
+
+    def __ior__(self, other):
+        '''In place union, only the entries of other that are new get copied.'''
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        # The in place operators split this tree's nodes while reading
+        # other's, so a tree combined with itself is answered directly
+        if other is self:
+            return self
+        other = self._in_same_order(other)
+        self._root = self._union(self._root, other._root, None)
+        self._count = 0 if self._root is None else self._root.size
+        self._version += 1
+        if self._bounded:
+            self._trim()
+        return self
+
+    def __iand__(self, other):
+        '''In place intersection, other is not modified.'''
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        if other is self:
+            return self
+        other = self._in_same_order(other)
+        self._root = self._intersection(self._root, other._root, None)
+        self._count = 0 if self._root is None else self._root.size
+        self._version += 1
+        return self
+
+    def __isub__(self, other):
+        '''In place difference, other is not modified.'''
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        if other is self:
+            self.clear()
+            return self
+        other = self._in_same_order(other)
+        self._root = self._difference(self._root, other._root)
+        self._count = 0 if self._root is None else self._root.size
+        self._version += 1
+        return self
+
+    def __ixor__(self, other):
+        '''In place symmetric difference, other is not modified.'''
+        if not isinstance(other, AVLTree):
+            return NotImplemented
+        if other is self:
+            self.clear()
+            return self
+        other = self._in_same_order(other)
+        self._root = self._symmetric_difference(self._root, other._root)
+        self._count = 0 if self._root is None else self._root.size
+        self._version += 1
+        if self._bounded:
+            self._trim()
+        return self
+
+    def _in_same_order(self, other):
+        '''
+        Returns other, or if other sorts with a different key function, a
+        copy of its entries sorted by this tree's key function. Set algebra
+        walks both trees in step, comparing their stored sort keys.
+        '''
+        if other._key_function == self._key_function:
+            return other
+        resorted = AVLTree(key=self._key_function)
+        resorted.update(other.items())
+        return resorted
+
+    ###
+    # Set algebra.  Each operation splits this tree's subtree at the root key
+    # of other's subtree, recurses on both halves and joins the results, so it
+    # costs O(m log(n / m + 1)) for trees of sizes m <= n.  Nodes of this tree
+    # are moved, nodes of other are only read, and copied when they are added,
+    # as nodes of this tree's kind since other may keep a different aggregate.
+    # An other sorted by a different key function is first copied into this
+    # tree's order, see _in_same_order.
+    ###
+    def _union(self, node, other, resolve):
+        if other is None:
+            return node
+        if node is None:
+            return self._copy_subtree(other)
+
+        left, found, right = self._split_node(node, other._key)
+        if found is None:
+            found = self._adopt(other)
+        elif resolve is None:
+            found.value = other.value
+        else:
+            found.value = resolve(found.key, found.value, other.value)
+
+        left = self._union(left, other._left, resolve)
+        right = self._union(right, other._right, resolve)
+        return self._join(left, found, right)
+
+    def _intersection(self, node, other, resolve):
+        if node is None or other is None:
+            return None
+
+        left, found, right = self._split_node(node, other._key)
+        left = self._intersection(left, other._left, resolve)
+        right = self._intersection(right, other._right, resolve)
+        if found is None:
+            return self._join_nodes(left, right)
+
+        if resolve is None:
+            found.value = other.value
+        else:
+            found.value = resolve(found.key, found.value, other.value)
+        return self._join(left, found, right)
+
+    def _difference(self, node, other):
+        if node is None or other is None:
+            return node
+
+        left, found, right = self._split_node(node, other._key)
+        left = self._difference(left, other._left)
+        right = self._difference(right, other._right)
+        return self._join_nodes(left, right)
+
+    def _symmetric_difference(self, node, other):
+        if other is None:
+            return node
+        if node is None:
+            return self._copy_subtree(other)
+
+        left, found, right = self._split_node(node, other._key)
+        left = self._symmetric_difference(left, other._left)
+        right = self._symmetric_difference(right, other._right)
+        if found is None:
+            return self._join(left, self._adopt(other), right)
+        return self._join_nodes(left, right)
+
+    def _split_node(self, node, key):
+        '''
+        Splits the subtree rooted at node at key.
+
+        @param node root AVLTreeNode of the subtree, or None.
+        @param key key to split at.
+        @return tuple of the root of the subtree with keys less than key, the
+                AVLTreeNode with key or None if it is not present, and the
+                root of the subtree with keys greater than key.
+        '''
+        if node is None:
+            return (None, None, None)
+
+        if node._key == key:
+            node = self._own(node)
+            left, right = node._left, node._right
+            node._left = None
+            node._right = None
+            node._calculate_height()
+            return (left, node, right)
+
+        if node._key < key:
+            left, found, right = self._split_node(node._right, key)
+            return (self._join(node._left, node, left), found, right)
+
+        left, found, right = self._split_node(node._left, key)
+        return (left, found, self._join(right, node, node._right))
+
+    def _join_nodes(self, left, right):
+        '''
+        Joins two subtrees without a middle node, every key in left must be
+        less than every key in right.
+
+        @return AVLTreeNode that is the root of the joined subtree.
+        '''
+        if left is None:
+            return right
+        if right is None:
+            return left
+
+        right, node = self._remove_min_node(right)
+        return self._join(left, node, right)
+
+    def _remove_min_node(self, node):
+        '''
+        Removes the minimum from the subtree rooted at node.
+
+        @return tuple of the new root of the subtree and the removed AVLTreeNode.
+        '''
+        node = self._own(node)
+        if node._left is None:
+            right = node._right
+            node._right = None
+            node._calculate_height()
+            return (right, node)
+
+        node._left, removed = self._remove_min_node(node._left)
+        return (self._rebalance(node), removed)
+
+    def _copy_subtree(self, node):
+        '''Copies the shape, keys and values of the subtree rooted at node.'''
+        if node is None:
+            return None
+
+        copy = self._adopt(node)
+        copy._left = self._copy_subtree(node._left)
+        copy._right = self._copy_subtree(node._right)
+        copy._calculate_height()
+        return copy
+
+    def _split(self, node, key, after=False):
+        '''
+        Splits the subtree rooted at node into the nodes with keys less than
+        key and the nodes with keys greater than or equal to key.
+
+        @param node root AVLTreeNode of the subtree, or None.
+        @param key key to split at.
+        @param after if True, the node with key goes to the first subtree.
+        @return tuple of the roots of the two subtrees.
+        '''
+        if node is None:
+            return (None, None)
+
+        if (not key < node._key) if after else node._key < key:
+            left, right = self._split(node._right, key, after)
+            return (self._join(node._left, node, left), right)
+
+        left, right = self._split(node._left, key, after)
+        return (left, self._join(right, node, node._right))
+
+    def _new_tree(self, root=None):
+        '''
+        Creates a new, empty tree with the same settings as this one.
+
+        @param root optional root AVLTreeNode of the new tree.
+        '''
+        tree = type(self)(key=self._key_function, aggregate=self._monoid, max_size=self._max_size,
+                          evict=self._evict, on_evict=self._on_evict, clock=self._clock)
+        tree.traversal_method = self.traversal_method
+        tree._root = root
+        tree._count = 0 if root is None else root.size
+        return tree
+
+    def clear(self):
+        '''Clear the contents of the tree'''
+        self._root = None
+        self._count = 0
+        self._token = object()
+        self._shared = False
+        self._version += 1
+        self._arrays = None
+
+    def enable_stats(self, hook=None):
+        '''
+        Turns on the stats mode. While it is on, the tree counts the key
+        comparisons made by its searches, range queries, batch updates, splits
+        and set operations, the search path lengths of each lookup, insert and
+        remove, the single and double rotations made by every rebalance, and
+        the nodes retraced after each insert and remove. Turning it on again
+        resets the counters.
+
+        Stats mode changes the class of the tree to an instrumented subclass,
+        so a tree that never turns it on runs exactly the same code as before.
+
+        @param hook
+                   Optional function(operation, seconds) called after each
+                   get, [], [] = and remove with its wall time, for example to
+                   forward it to a metrics system. operation is 'get',
+                   'getitem', 'setitem' or 'remove'.
+        '''
+        if not isinstance(self, AVLTreeStats.AVLTreeStatsMixin):
+            self.__class__ = AVLTreeStats.instrumented_class(type(self))
+        self._stats = AVLTreeStats.AVLTreeStats()
+        self._stats_hook = hook
+        self._stats_probe = None
+
+    def disable_stats(self):
+        '''Turns off the stats mode and discards the counters.'''
+        if isinstance(self, AVLTreeStats.AVLTreeStatsMixin):
+            self.__class__ = self._stats_base
+            del self._stats
+            del self._stats_hook
+            del self._stats_probe
+
+    def stats(self):
+        '''
+        Returns the counters of the stats mode as a dict, see
+        AVLTreeStats.as_dict, or None if the stats mode is off.
+        '''
+        if not isinstance(self, AVLTreeStats.AVLTreeStatsMixin):
+            return None
+        return self._stats.as_dict()
+
+    def reset_stats(self):
+        '''Sets the counters of the stats mode back to zero.'''
+        if isinstance(self, AVLTreeStats.AVLTreeStatsMixin):
+            self._stats.reset()
+
+    def update(self, items):
+        '''
+        Adds or replaces a batch of key/value pairs. The batch is sorted once
+        and merged into the tree, so each node near the top of the tree is
+        compared against the batch once instead of once per key, and each
+        subtree is rebalanced once per batch instead of once per key. When the
+        batch is large compared to the tree, the tree is rebuilt with a linear
+        merge instead.
+
+        If a key appears more than once in the batch, the last value wins.
+
+        @param items
+                   Mapping, or iterable of (key, value) pairs.
+        '''
+        pairs = list(items.items()) if hasattr(items, 'items') else list(items)
+        if len(pairs) == 0:
+            return
+        self._version += 1
+
+        if self._key_function is None:
+            pairs.sort(key=itemgetter(0))
+            sort_keys = [pair[0] for pair in pairs]
+        else:
+            decorated = sorted(((self._key_function(pair[0]), pair) for pair in pairs), key=itemgetter(0))
+            sort_keys = [item[0] for item in decorated]
+            pairs = [item[1] for item in decorated]
+
+        keys = [sort_keys[0]]
+        unique = [pairs[0]]
+        for sort_key, pair in zip(sort_keys, pairs):
+            if sort_key == keys[-1]:
+                unique[-1] = pair
+            else:
+                keys.append(sort_key)
+                unique.append(pair)
+        pairs = unique
+
+        # Merging costs about m * log(n / m + 1) comparisons, a rebuild touches
+        # all n + m entries.  See benchmark.py for where the rebuild wins.
+        if len(pairs) > 2 * self._count:
+            self._root = self._rebuild_merged(pairs, keys)
+        else:
+            self._root = self._merge_sorted(self._root, pairs, keys, 0, len(pairs))
+        if self._bounded:
+            self._trim()
+
+    def _rebuild_merged(self, pairs, keys):
+        '''
+        Merges the sorted, unique pairs with the nodes of the tree in a single
+        linear pass, and relinks the result into a perfectly balanced tree.
+        Existing nodes are reused, new nodes are created only for new keys.
+
+        @param pairs list of (key, value) pairs in ascending key order.
+        @param keys list of the sort keys of the pairs.
+        @return AVLTreeNode that is the root of the rebuilt tree.
+        '''
+        merged = []
+        stack = []
+        current = self._root
+        for key, (original_key, value) in zip(keys, pairs):
+            # Emit tree nodes, in order, until reaching key
+            while current is not None or len(stack) > 0:
+                while current is not None:
+                    stack.append(current)
+                    current = current._left
+                if not stack[-1]._key < key:
+                    break
+                node = stack.pop()
+                merged.append(self._own(node))
+                current = node._right
+
+            if len(stack) > 0 and stack[-1]._key == key:
+                node = stack.pop()
+                current = node._right
+                node = self._own(node)
+                node.value = value
+            else:
+                node = self._new_node(original_key, value, key)
+            merged.append(node)
+
+        while current is not None or len(stack) > 0:
+            while current is not None:
+                stack.append(current)
+                current = current._left
+            node = stack.pop()
+            merged.append(self._own(node))
+            current = node._right
+
+        self._count = len(merged)
+        return AVLTree._link_balanced(merged, 0, len(merged))
+
+    @staticmethod
+    def _link_balanced(nodes, low, high):
+        '''
+        Relinks the nodes[low:high], which are in ascending key order, into a
+        perfectly balanced subtree.
+
+        @param nodes list of AVLTreeNodes in ascending key order.
+        @param low index of the first node in the subtree.
+        @param high index one past the last node in the subtree.
+
+        @return root AVLTreeNode of the subtree, or None if the range is empty.
+        '''
+        if low >= high:
+            return None
+
+        middle = (low + high) // 2
+        node = nodes[middle]
+        node._left = AVLTree._link_balanced(nodes, low, middle)
+        node._right = AVLTree._link_balanced(nodes, middle + 1, high)
         node._calculate_height()
-        right_node._calculate_height()
+        return node
+
+    def _merge_sorted(self, node, pairs, keys, low, high):
+        '''
+        Merges the sorted, unique pairs[low:high] into the subtree rooted at
+        node.
+
+        @param node root AVLTreeNode of the subtree, or None.
+        @param pairs list of (key, value) pairs in ascending key order.
+        @param keys list of the sort keys of the pairs, used for bisecting.
+        @param low index of the first pair to merge.
+        @param high index one past the last pair to merge.
+        @return AVLTreeNode that is the new root of the subtree.
+        '''
+        if low >= high:
+            return node
+        if node is None:
+            self._count += high - low
+            return self._build_balanced(pairs, keys, low, high)
+
+        node = self._own(node)
+        split = bisect_left(keys, node._key, low, high)
+        after = split
+        if split < high and keys[split] == node._key:
+            node.value = pairs[split][1]
+            after += 1
+
+        left = self._merge_sorted(node._left, pairs, keys, low, split)
+        right = self._merge_sorted(node._right, pairs, keys, after, high)
+        return self._join(left, node, right)
+
+    @classmethod
+    def from_sorted(cls, items, check=True, key=None, aggregate=None):
+        '''
+        Creates a new, perfectly balanced AVLTree from key/value pairs that are
+        already sorted by key. The tree is built directly from the sorted
+        pairs in O(n) time, without the comparisons, height recalculations and
+        rotations that inserting each pair would cost.
+
+        @param items
+                   Iterable of (key, value) pairs in ascending key order, for
+                   example the in order iteration of another AVLTree.
+        @param check
+                   If True, verify that the keys are strictly ascending. This
+                   costs one comparison per pair. If False the input is trusted,
+                   and unsorted input will produce an invalid tree.
+        @param key
+                   Optional key function of the new tree, the pairs must be
+                   sorted by it.
+        @param aggregate
+                   Optional aggregate monoid of the new tree, see __init__.
+
+        @return new AVLTree holding the pairs.
+
+        @throws ValueError if check is True and the keys are duplicated or not
+                in ascending order.
+        '''
+        items = items if isinstance(items, list) else list(items)
+        if key is None:
+            keys = [item[0] for item in items]
+        else:
+            keys = [key(item[0]) for item in items]
+
+        if check:
+            for i in range(1, len(keys)):
+                if not keys[i - 1] < keys[i]:
+                    if keys[i - 1] == keys[i]:
+                        raise ValueError(f'! Duplicate key {items[i][0]} in sorted input !')
+                    raise ValueError(f'! Key {items[i][0]} is out of order in sorted input !')
+
+        tree = cls(key=key, aggregate=aggregate)
+        tree._root = tree._build_balanced(items, keys, 0, len(items))
+        tree._count = len(items)
+        return tree
+
+    def dump(self, fileobj, key_codec=None, value_codec=None):
+        '''
+        Writes the tree to a binary file. The file holds a versioned header
+        followed by the key/value records in ascending key order, and is
+        written in bounded memory.
+
+        @param fileobj
+                   Binary file object, open for writing.
+        @param key_codec
+                   AVLTreeCodec used for the keys. By default the most compact
+                   built in codec that fits every key is chosen.
+        @param value_codec
+                   AVLTreeCodec used for the values, chosen the same way.
+        '''
+        if key_codec is None:
+            key_codec = AVLTreeCodec.detect_codec(item[0] for item in self._in_order())
+        if value_codec is None:
+            value_codec = AVLTreeCodec.detect_codec(item[1] for item in self._in_order())
+
+        buffer = bytearray(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION))
+        for codec in (key_codec, value_codec):
+            name = codec.name.encode('ascii')
+            buffer.append(len(name))
+            buffer += name
+        buffer += _FILE_COUNT.pack(self._count)
+
+        for key, value in self._in_order():
+            for codec, obj in ((key_codec, key), (value_codec, value)):
+                data = codec.encode(obj)
+                if codec.size is None:
+                    buffer += _FIELD_LENGTH.pack(len(data))
+                buffer += data
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                fileobj.write(buffer)
+                buffer.clear()
+        fileobj.write(buffer)
+
+    @classmethod
+    def load(cls, fileobj, key=None, aggregate=None):
+        '''
+        Creates a new, perfectly balanced AVLTree from a file written by dump.
+        The records are streamed into place in O(n), without comparing any
+        keys and without holding more than one record in memory.
+
+        @param fileobj
+                   Binary file object, open for reading.
+        @param key
+                   Optional key function of the new tree, it must order the
+                   keys the same way as the key function of the dumped tree.
+        @param aggregate
+                   Optional aggregate monoid of the new tree, see __init__.
+
+        @return new AVLTree holding the entries in the file.
+
+        @throws ValueError if the file is not a tree file, uses an unknown
+                format version or codec, or is truncated.
+        '''
+        def read(size):
+            data = fileobj.read(size)
+            if len(data) != size:
+                raise ValueError('! Unexpected end of AVL Tree file !')
+            return data
+
+        magic, version = _FILE_HEADER.unpack(read(_FILE_HEADER.size))
+        if magic != _FILE_MAGIC:
+            raise ValueError('! Not an AVL Tree file !')
+        if version != _FILE_VERSION:
+            raise ValueError(f'! Unsupported AVL Tree file version {version} !')
+        key_codec = AVLTreeCodec.get_codec(read(read(1)[0]).decode('ascii'))
+        value_codec = AVLTreeCodec.get_codec(read(read(1)[0]).decode('ascii'))
+        count = _FILE_COUNT.unpack(read(_FILE_COUNT.size))[0]
+
+        def read_field(codec):
+            if codec.size is None:
+                return codec.decode(read(_FIELD_LENGTH.unpack(read(_FIELD_LENGTH.size))[0]))
+            return codec.decode(read(codec.size))
+
+        def read_pair():
+            key = read_field(key_codec)
+            return (key, read_field(value_codec))
+
+        tree = cls(key=key, aggregate=aggregate)
+        tree._root = tree._build_streamed(read_pair, count)
+        tree._count = count
+        return tree
+
+    def _build_streamed(self, read_pair, size):
+        '''
+        Builds a perfectly balanced subtree from the next size pairs of a
+        stream that is in ascending key order, reading them in order.
+
+        @param read_pair function returning the next (key, value) pair.
+        @param size number of pairs in the subtree.
+
+        @return root AVLTreeNode of the subtree, or None if size is 0.
+        '''
+        if size == 0:
+            return None
+
+        left_size = size // 2
+        left = self._build_streamed(read_pair, left_size)
+        key, value = read_pair()
+        node = self._new_node(key, value, self._sort_key(key))
+        node._left = left
+        node._right = self._build_streamed(read_pair, size - left_size - 1)
+        node._calculate_height()
+        return node
+
+    def _in_order(self):
+        '''Returns an in order iterator over the tree, regardless of traversal_method.'''
+        return AVLTreeInOrderIterator.AVLTreeInOrderIterator(self._root, self)
+
+    def _build_balanced(self, items, keys, low, high):
+        '''
+        Builds a perfectly balanced subtree from the sorted pairs items[low:high].
+
+        @param items list of (key, value) pairs in ascending key order.
+        @param keys list of the sort keys of the pairs.
+        @param low index of the first pair in the subtree.
+        @param high index one past the last pair in the subtree.
+
+        @return root AVLTreeNode of the subtree, or None if the range is empty.
+        '''
+        if low >= high:
+            return None
+
+        middle = (low + high) // 2
+        key, value = items[middle]
+        node = self._new_node(key, value, keys[middle])
+        node._left = self._build_balanced(items, keys, low, middle)
+        node._right = self._build_balanced(items, keys, middle + 1, high)
+        node._calculate_height()
+        return node
+
+    def _new_node(self, key, value, sort_key):
+        '''
+        Creates a node owned by this tree.
+
+        @param key key given by the caller.
+        @param value value to store.
+        @param sort_key the sort key of key, the result of _sort_key(key).
+        '''
+        if self._monoid is not None:
+            return AVLTreeNode.AVLTreeAggregateNode(key, value, self._token, sort_key, self._monoid)
+        if self._key_function is None:
+            return AVLTreeNode.AVLTreeNode(key, value, self._token)
+        return AVLTreeNode.AVLTreeKeyedNode(key, value, self._token, sort_key)
+
+    def _adopt(self, node):
+        '''Creates a node owned by this tree holding the entry of node, which may come from another tree.'''
+        return self._new_node(node.key, node.value, node._key)
+
+    def _sort_key(self, key):
+        '''Returns the sort key of key, the value the tree orders it by.'''
+        return key if self._key_function is None else self._key_function(key)
+
+    def _rotate_right(self, node, parent):
+        '''
+        AVL Function to to rotate right at a given node, with a given parent.
+             used in the balancing algorithm.
+        
+        @param *node pointer to AVLTreeNode to rotate
+        @param *parent pointer to AVLTreeNode of the parent to *node
+                  if parent is None, the parent is _root
+        @return AVLTreeNode that took node's place
+        '''
+        left_node = self._rotate_subtree_right(node)
+        
+        if parent is None:
+            self._root = left_node
+        else:
+            if parent._left is node:
+                parent._left = left_node
+            else:
+                parent._right = left_node    
+        return left_node
+                
+    def _rotate_left(self, node, parent):
+        '''
+        AVL Function to to rotate left at a given node, with a given parent.
+             used in the balancing algorithm.
+        
+        @param *node pointer to AVLTreeNode to rotate
+        @param *parent pointer to AVLTreeNode of the parent to *node
+                 if parent is None, the parent is _root
+        @return AVLTreeNode that took node's place
+        '''
+        right_node = self._rotate_subtree_left(node)
         
         if parent is None:
             self._root = right_node
         else:
-            if right_node.key < parent.key:
+            if parent._left is node:
                 parent._left = right_node
             else:
                 parent._right = right_node
+        return right_node
     
+    def _rotate_left_right(self, node, parent):
+        '''
+        AVL double rotation, left at node's left child and then right at node.
+
+        @param *node pointer to AVLTreeNode to rotate
+        @param *parent pointer to AVLTreeNode of the parent to *node
+        @return AVLTreeNode that took node's place
+        '''
+        self._rotate_left(node._left, node)
+        return self._rotate_right(node, parent)
+
+    def _rotate_right_left(self, node, parent):
+        '''
+        AVL double rotation, right at node's right child and then left at node.
+
+        @param *node pointer to AVLTreeNode to rotate
+        @param *parent pointer to AVLTreeNode of the parent to *node
+        @return AVLTreeNode that took node's place
+        '''
+        self._rotate_right(node._right, node)
+        return self._rotate_left(node, parent)
+
+    def _own(self, node):
+        '''
+        Returns node if this tree may change it in place, otherwise a copy of
+        node that this tree owns. The caller must link the copy in place of node.
+
+        @param node AVLTreeNode, or None.
+        '''
+        if node is None or node._owner is self._token:
+            return node
+        return node._copy(self._token)
+
+    def _own_left(self, node):
+        '''Makes sure this tree owns the left child of the owned node, and returns it.'''
+        child = node._left
+        if child is not None and child._owner is not self._token:
+            child = node._left = child._copy(self._token)
+        return child
+
+    def _own_right(self, node):
+        '''Makes sure this tree owns the right child of the owned node, and returns it.'''
+        child = node._right
+        if child is not None and child._owner is not self._token:
+            child = node._right = child._copy(self._token)
+        return child
+
+    def _own_path(self, stack):
+        '''
+        Makes sure this tree owns every node on a search path, copying the
+        shared ones and linking each copy in place of the original.
+
+        @param stack list of the AVLTreeNodes on the path from the root down,
+               with None at the bottom for the parent of the root.
+        '''
+        token = self._token
+        parent = None
+        for i in range(1, len(stack)):
+            node = stack[i]
+            if node._owner is not token:
+                stack[i] = node._copy(token)
+                if parent is None:
+                    self._root = stack[i]
+                elif parent._left is node:
+                    parent._left = stack[i]
+                else:
+                    parent._right = stack[i]
+            parent = stack[i]
+
+    def _retrace(self, stack, delta):
+        '''
+        Goes back up the tree along a search path after an insert or a remove,
+        resetting heights and rebalancing each node on the way. Once a
+        subtree's height is unchanged, no node above it can need rebalancing,
+        so the rest of the path only has its sizes adjusted by delta.
+
+        @param stack list of the AVLTreeNodes on the path from the root down,
+               with None at the bottom for the parent of the root. The nodes
+               retraced are popped, the ones left only had their sizes adjusted.
+        @param delta change in the number of entries, 1 or -1.
+        '''
+        monoid = self._monoid
+        current = stack.pop()
+        while current is not None:
+            height = current.height
+            left = current._left
+            right = current._right
+            left_height = -1 if left is None else left.height
+            right_height = -1 if right is None else right.height
+
+            if left_height > right_height + 1:
+                if left.balance_factor < 0:
+                    current = self._rotate_left_right(current, stack[-1])
+                else:
+                    current = self._rotate_right(current, stack[-1])
+            elif right_height > left_height + 1:
+                if right.balance_factor > 0:
+                    current = self._rotate_right_left(current, stack[-1])
+                else:
+                    current = self._rotate_left(current, stack[-1])
+            else:
+                current.height = (left_height if left_height > right_height else right_height) + 1
+                current.size = 1 + (0 if left is None else left.size) + (0 if right is None else right.size)
+                if monoid is not None:
+                    current._calculate_aggregate()
+
+            if current.height == height:
+                break
+            current = stack.pop()
+
+        if monoid is None:
+            for i in range(1, len(stack)):
+                stack[i].size += delta
+        else:
+            # Every aggregate on the path changed, recalculate them bottom up
+            for i in range(len(stack) - 1, 0, -1):
+                stack[i].size += delta
+                stack[i]._calculate_aggregate()
+
+    def _rotate_subtree_right(self, node):
+        '''
+        Rotates the subtree rooted at node to the right, without relinking it
+        to a parent.
+
+        @param node AVLTreeNode to rotate.
+        @return AVLTreeNode that is the new root of the subtree.
+        '''
+        node = self._own(node)
+        left_node = self._own(node._left)
+        node._left = left_node._right
+        left_node._right = node
+
+        node._calculate_height()
+        left_node._calculate_height()
+        return left_node
+
+    def _rotate_subtree_left(self, node):
+        '''
+        Rotates the subtree rooted at node to the left, without relinking it
+        to a parent.
+
+        @param node AVLTreeNode to rotate.
+        @return AVLTreeNode that is the new root of the subtree.
+        '''
+        node = self._own(node)
+        right_node = self._own(node._right)
+        node._right = right_node._left
+        right_node._left = node
+
+        node._calculate_height()
+        right_node._calculate_height()
+        return right_node
+
+    def _rebalance(self, node):
+        '''
+        Recalculates the height of node and restores the AVL property at node
+        with a single or double rotation. The children of node must already be
+        valid AVL subtrees.
+
+        @param node AVLTreeNode to rebalance.
+        @return AVLTreeNode that is the new root of the subtree.
+        '''
+        node = self._own(node)
+        node._calculate_height()
+        if node.balance_factor > 1:
+            if node._left.balance_factor < 0:
+                node._left = self._rotate_subtree_left(node._left)
+            return self._rotate_subtree_right(node)
+        if node.balance_factor < -1:
+            if node._right.balance_factor > 0:
+                node._right = self._rotate_subtree_right(node._right)
+            return self._rotate_subtree_left(node)
+        return node
+
+    def _join(self, left, node, right):
+        '''
+        Height based AVL join. Links the subtrees left and right under node,
+        where every key in left is less than node.key and every key in right
+        is greater. Runs in O(|left.height - right.height|).
+
+        @param left root AVLTreeNode of the lesser subtree, or None.
+        @param node AVLTreeNode used to join the two subtrees.
+        @param right root AVLTreeNode of the greater subtree, or None.
+        @return AVLTreeNode that is the root of the joined subtree.
+        '''
+        left_height = -1 if left is None else left.height
+        right_height = -1 if right is None else right.height
+
+        if left_height > right_height + 1:
+            left = self._own(left)
+            left._right = self._join(left._right, node, right)
+            return self._rebalance(left)
+        if right_height > left_height + 1:
+            right = self._own(right)
+            right._left = self._join(left, node, right._left)
+            return self._rebalance(right)
+
+        node = self._own(node)
+        node._left = left
+        node._right = right
+        node._calculate_height()
+        return node
+
+    def keys(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''
+        Returns a lazy view of the keys. The view supports len() and reversed().
+
+        @param order
+                   AVLTreeTraversalMethod of the view, independent of the
+                   tree's traversal_method.
+        '''
+        return AVLTreeView.AVLTreeView(self, 'keys', order)
+
+    def values(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''
+        Returns a lazy view of the values, in the order of their keys. The view
+        supports len() and reversed().
+
+        @param order AVLTreeTraversalMethod of the view.
+        '''
+        return AVLTreeView.AVLTreeView(self, 'values', order)
+
+    def items(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''
+        Returns a lazy view of the key/value pairs. The view supports len()
+        and reversed().
+
+        @param order AVLTreeTraversalMethod of the view.
+        '''
+        return AVLTreeView.AVLTreeView(self, 'items', order)
+
+    def _view_iter(self, kind, order, reverse):
+        '''
+        Returns an iterator for an AVLTreeView.
+
+        @param kind 'keys', 'values' or 'items'.
+        @param order AVLTreeTraversalMethod of the view.
+        @param reverse if True, iterate in the opposite order.
+
+        @throws TypeError if reverse is True and order is TOP_DOWN.
+        '''
+        if order is AVLTreeTraversalMethod.TOP_DOWN:
+            if reverse:
+                raise TypeError('! A top down view can not be reversed !')
+            nodes = self._top_down_nodes(self._version)
+        else:
+            nodes = self._ordered_nodes(self._version, (order is AVLTreeTraversalMethod.REVERSE_ORDER) != reverse)
+
+        key = '_key' if self._key_function is None else '_original_key'
+        if kind == 'keys':
+            return map(attrgetter(key), nodes)
+        if kind == 'values':
+            return map(attrgetter('value'), nodes)
+        return map(attrgetter(key, 'value'), nodes)
+
+    def _view_contains(self, kind, item):
+        '''
+        Returns whether an AVLTreeView of the keys or the key/value pairs
+        holds item, with a single lookup.
+
+        @param kind 'keys' or 'items'.
+        '''
+        if kind == 'keys':
+            return self._find(item) is not None
+        if type(item) is not tuple or len(item) != 2:
+            return False
+        found = self._find(item[0])
+        return found is not None and (found.value is item[1] or found.value == item[1])
+
+    def _ordered_nodes(self, version, descending):
+        '''
+        Yields the nodes in natural order, or in reverse if descending.
+
+        @param version the tree's version when the iteration was created.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        stack = []
+        node = self._root
+        if descending:
+            while True:
+                while node is not None:
+                    stack.append(node)
+                    node = node._right
+                if len(stack) == 0:
+                    return
+                if self._version != version:
+                    raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+                node = stack.pop()
+                yield node
+                node = node._left
+
+        while True:
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            if len(stack) == 0:
+                return
+            if self._version != version:
+                raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+            node = stack.pop()
+            yield node
+            node = node._right
+
+    def _top_down_nodes(self, version):
+        '''
+        Yields the nodes level by level, from the root down.
+
+        @param version the tree's version when the iteration was created.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        queue = deque()
+        if self._root is not None:
+            queue.append(self._root)
+        while len(queue) > 0:
+            if self._version != version:
+                raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+            node = queue.popleft()
+            yield node
+            if node._left is not None:
+                queue.append(node._left)
+            if node._right is not None:
+                queue.append(node._right)
+
     def __iter__(self):
         
         match self.traversal_method:
             case AVLTreeTraversalMethod.IN_ORDER:
-                return AVLTreeInOrderIterator.AVLTreeInOrderIterator(self._root)
+                return AVLTreeInOrderIterator.AVLTreeInOrderIterator(self._root, self)
             case AVLTreeTraversalMethod.REVERSE_ORDER:
-                return AVLTreeReverseOrderIterator.AVLTreeReverseOrderIterator(self._root)
+                return AVLTreeReverseOrderIterator.AVLTreeReverseOrderIterator(self._root, self)
             case AVLTreeTraversalMethod.TOP_DOWN:
-                return AVLTreeTopDownOrderIterator.AVLTreeTopDownOrderIterator(self._root)
+                return AVLTreeTopDownOrderIterator.AVLTreeTopDownOrderIterator(self._root, self)
@@ -0,0 +1,141 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+import pickle
+import struct
+
+class AVLTreeCodec():
+    '''
+    Base class for the codecs used by AVLTree.dump and AVLTree.load to turn
+    keys and values into bytes and back.
+
+    A codec is identified in the file header by its name, so a custom codec
+    must be registered with register_codec before a file using it is loaded.
+    Codecs with a fixed size write their bytes as is, all others are written
+    with a length prefix.
+    '''
+
+    name = None
+    '''Name stored in the file header, at most 255 ASCII characters.'''
+
+    size = None
+    '''Number of bytes of every encoded object, or None if it varies.'''
+
+    def encode(self, obj):
+        '''Returns obj encoded as bytes.'''
+        raise NotImplementedError
+
+    def decode(self, data):
+        '''Returns the object encoded in data.'''
+        raise NotImplementedError
+
+
+class StructCodec(AVLTreeCodec):
+    '''Fixed size codec for a single number, using the struct module.'''
+
+    def __init__(self, name, format):
+        '''
+        @param name Name of the codec.
+        @param format struct format string of a single number, e.g. '<q'.
+        '''
+        self.name = name
+        self._struct = struct.Struct(format)
+        self.size = self._struct.size
+
+    def encode(self, obj):
+        return self._struct.pack(obj)
+
+    def decode(self, data):
+        return self._struct.unpack(data)[0]
+
+
+class Utf8Codec(AVLTreeCodec):
+    '''Codec for str objects.'''
+
+    name = 'utf8'
+
+    def encode(self, obj):
+        return obj.encode('utf-8')
+
+    def decode(self, data):
+        return data.decode('utf-8')
+
+
+class PickleCodec(AVLTreeCodec):
+    '''
+    Codec for any picklable object. Only load files using this codec from
+    trusted sources, unpickling can run arbitrary code.
+    '''
+
+    name = 'pickle'
+
+    def encode(self, obj):
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+INT64 = StructCodec('int64', '<q')
+FLOAT64 = StructCodec('float64', '<d')
+UTF8 = Utf8Codec()
+PICKLE = PickleCodec()
+
+_codecs = {codec.name: codec for codec in (INT64, FLOAT64, UTF8, PICKLE)}
+
+
+def register_codec(codec):
+    '''Registers a custom AVLTreeCodec, so files written with it can be loaded.'''
+    _codecs[codec.name] = codec
+
+
+def get_codec(name):
+    '''
+    Returns the registered codec with name.
+
+    @throws ValueError if no codec with name is registered
+    '''
+    if name not in _codecs:
+        raise ValueError(f'! Unknown codec {name} !')
+    return _codecs[name]
+
+
+def detect_codec(objects):
+    '''
+    Returns the most compact built in codec able to encode every object in
+    objects: INT64 for ints that fit in 64 bits, FLOAT64 for floats, UTF8
+    for strs, and PICKLE for anything else or for a mix of types.
+
+    @param objects iterable of the keys or values to encode.
+    '''
+    kind = None
+    for obj in objects:
+        if type(obj) is int:
+            if not -2**63 <= obj < 2**63:
+                return PICKLE
+            current = INT64
+        elif type(obj) is float:
+            current = FLOAT64
+        elif type(obj) is str:
+            current = UTF8
+        else:
+            return PICKLE
+        if kind is None:
+            kind = current
+        elif kind is not current:
+            return PICKLE
+    return PICKLE if kind is None else kind
@@ -39,18 +39,23 @@ class AVLTreeIterator():
     '''
 
         
-    def __init__(self, root:AVLTreeNode):
+    def __init__(self, root:AVLTreeNode, tree=None):
         '''
         Constructor.
          
         @param Root
                     AVLTreeNode where the iteration will start.
+        @param Tree
+                    Optional AVLTree being iterated. If given, the iterator
+                    becomes invalid as soon as the tree is changed.
         @throws Exception
         '''
         self._current = None
         self._status = StatusEnum.BEFORE_FIRST
         self._stack = []
         self._root = root
+        self._tree = tree
+        self._version = None if tree is None else tree._version
         
         self._move_next()
         
@@ -65,21 +70,30 @@ class AVLTreeIterator():
         '''
         pass
     
+    def __iter__(self):
+        '''Returns the iterator itself, so it can be used in a for loop.'''
+        return self
+    
     def __next__(self):
         '''
         Returns the current element in the iteration.
         
         @return The TValue element at the current pointer location.
         @throws Exception
+        @throws RuntimeError if the tree has changed since the iterator was created
         '''
+        if self._status == StatusEnum.AFTER_LAST:
+            # An exhausted iterator stays exhausted, whatever the tree does
+            raise StopIteration
+            # raise Exception('! After Last element of AVL Search Tree !')
+        if self._tree is not None and self._tree._version != self._version:
+            self._status = StatusEnum.INVALID
+            raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
         if self._status == StatusEnum.OK or self._status == StatusEnum.INVALID:
             return_value = self._current.get_tuple()
             self._move_next()
             return return_value
         if self._status == StatusEnum.BEFORE_FIRST:
             raise Exception('! Before first element of AVL Search Tree, Call _move_next first !')
-        if self._status == StatusEnum.AFTER_LAST:
-            raise StopIteration
-            # raise Exception('! After Last element of AVL Search Tree !')
         raise Exception('! Unknown Status during iteration !')
         
\ No newline at end of file
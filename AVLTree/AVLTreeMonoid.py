@@ -0,0 +1,116 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+import operator
+
+class AVLTreeMonoid():
+    '''
+    Monoid used by AVLTree(aggregate=...) to keep an aggregate of every
+    subtree on its root node, so AVLTree.reduce answers range aggregates in
+    O(log n).
+
+    combine must be associative and identity must be its identity element:
+    combine(identity, a) == combine(a, identity) == a. combine does not need
+    to be commutative, it is always called with the lesser keys on the left.
+
+    @param name
+               Name of the monoid, used by get_monoid.
+    @param combine
+               Function(a, b) returning the aggregate of two adjacent runs of
+               entries, a holding the lesser keys.
+    @param identity
+               Aggregate of no entries.
+    @param lift
+               Optional function(key, value) returning the aggregate of a
+               single entry. Defaults to the value.
+    '''
+
+    def __init__(self, name, combine, identity, lift=None):
+        self.name = name
+        self.combine = combine
+        self.identity = identity
+        self.lift = _lift_value if lift is None else lift
+
+    def __eq__(self, other):
+        '''Monoids are equal when they combine, start and lift entries the same way, whatever their names.'''
+        if not isinstance(other, AVLTreeMonoid):
+            return NotImplemented
+        return self.combine == other.combine and self.identity == other.identity and self.lift == other.lift
+
+    def __hash__(self):
+        return hash((self.combine, self.lift))
+
+    def __repr__(self):
+        return f'AVLTreeMonoid({self.name!r})'
+
+
+def _lift_value(key, value):
+    return value
+
+
+def _min(a, b):
+    '''Lesser of a and b, None is the identity.'''
+    if a is None:
+        return b
+    return a if b is None or not b < a else b
+
+
+def _max(a, b):
+    '''Greater of a and b, None is the identity.'''
+    if a is None:
+        return b
+    return a if b is None or not a < b else b
+
+
+SUM = AVLTreeMonoid('sum', operator.add, 0)
+COUNT = AVLTreeMonoid('count', operator.add, 0, lambda key, value: 1)
+MIN = AVLTreeMonoid('min', _min, None)
+MAX = AVLTreeMonoid('max', _max, None)
+
+_monoids = {monoid.name: monoid for monoid in (SUM, COUNT, MIN, MAX)}
+
+
+def register_monoid(monoid):
+    '''Registers a custom AVLTreeMonoid, so trees can be created with its name.'''
+    _monoids[monoid.name] = monoid
+
+
+def get_monoid(name):
+    '''
+    Returns the registered monoid with name.
+
+    @throws ValueError if no monoid with name is registered
+    '''
+    if name not in _monoids:
+        raise ValueError(f'! Unknown monoid {name} !')
+    return _monoids[name]
+
+
+def as_monoid(aggregate):
+    '''
+    Returns the AVLTreeMonoid described by aggregate: an AVLTreeMonoid, the
+    name of a registered monoid, or a (combine, identity) pair.
+
+    @throws ValueError if aggregate is none of these
+    '''
+    if isinstance(aggregate, AVLTreeMonoid):
+        return aggregate
+    if isinstance(aggregate, str):
+        return get_monoid(aggregate)
+    if isinstance(aggregate, tuple) and len(aggregate) == 2 and callable(aggregate[0]):
+        return AVLTreeMonoid(getattr(aggregate[0], '__name__', 'custom'), aggregate[0], aggregate[1])
+    raise ValueError(f'! aggregate must be an AVLTreeMonoid, a monoid name or a (combine, identity) pair, not {aggregate!r} !')
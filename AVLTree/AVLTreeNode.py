@@ -24,17 +24,23 @@ class AVLTreeNode():
     @param <TValue>	Generic type representing the data being stored.
     '''
 
-    def __init__(self, key, value):
+    # Nodes are the bulk of a tree's memory, slots keep each one free of a
+    # per instance __dict__.
+    __slots__ = ('_key', 'value', '_left', '_right', 'height', 'size', '_owner')
+
+    def __init__(self, key, value, owner=None):
         '''
         Creates a leaf node with no left or right children.
 
         @param Key		Key used for sorting.  Must be Comparable.
         @param Value		Data being stored in the Tree.
+        @param Owner		Token of the tree allowed to modify the node in place.
         '''
         self._key = key
         self.value = value
         self._left = None
         self._right = None
+        self._owner = owner
         self._calculate_height()
 
 
@@ -51,10 +57,12 @@ class AVLTreeNode():
 
 
     def _calculate_height(self):
-        '''Recalcualtes the height of the node'''
+        '''Recalcualtes the height of the node, and the size of its subtree'''
         r = -1 if self._right is None else self._right.height
         l = -1 if self._left is None else self._left.height
         self.height = r + 1 if r > l else l + 1
+        self.size = 1 + (0 if self._right is None else self._right.size) \
+            + (0 if self._left is None else self._left.size)
 
 
     @property
@@ -71,6 +79,108 @@ class AVLTreeNode():
         l = -1 if self._left is None else self._left.height
         return l - r
 
+    def _copy(self, owner):
+        '''
+        Returns a copy of the node, sharing its children, that is owned by owner.
+        Used to copy the path to a change when the node is shared with a snapshot.
+        '''
+        copy = self.__class__.__new__(self.__class__)
+        copy._key = self._key
+        copy.value = self.value
+        copy._left = self._left
+        copy._right = self._right
+        copy.height = self.height
+        copy.size = self.size
+        copy._owner = owner
+        return copy
+
     def get_tuple(self):
         '''Returns a simple key, value pair tuple'''
         return (self._key, self.value)
+
+
+class AVLTreeKeyedNode(AVLTreeNode):
+    '''
+    Node used in an AVLTree created with a key function.  The sort key is
+    computed once, when the node is created, and stored in _key where the
+    tree compares it; the key the caller gave is kept alongside it and is
+    what key and get_tuple return.
+    '''
+
+    __slots__ = ('_original_key',)
+
+    def __init__(self, key, value, owner=None, sort_key=None):
+        '''
+        Creates a leaf node with no left or right children.
+
+        @param Key		Key given by the caller, returned by key and get_tuple.
+        @param Value		Data being stored in the Tree.
+        @param Owner		Token of the tree allowed to modify the node in place.
+        @param Sort_Key	Result of the tree's key function for Key, used for sorting.
+        '''
+        AVLTreeNode.__init__(self, sort_key, value, owner)
+        self._original_key = key
+
+
+    @property
+    def key(self):
+        '''Returns the key of the tree node, as given when it was added.'''
+        return self._original_key
+
+    def _copy(self, owner):
+        '''Returns a copy of the node, sharing its children, that is owned by owner.'''
+        copy = AVLTreeNode._copy(self, owner)
+        copy._original_key = self._original_key
+        return copy
+
+    def get_tuple(self):
+        '''Returns a simple key, value pair tuple'''
+        return (self._original_key, self.value)
+
+
+class AVLTreeAggregateNode(AVLTreeKeyedNode):
+    '''
+    Node used in an AVLTree created with an aggregate monoid.  Besides its
+    height and size, the node keeps the aggregate of its subtree, combined
+    from its children's aggregates and its own entry whenever the height is
+    recalculated, so rotations, joins and rebuilds keep it current.
+    '''
+
+    __slots__ = ('aggregate', '_monoid')
+
+    def __init__(self, key, value, owner=None, sort_key=None, monoid=None):
+        '''
+        Creates a leaf node with no left or right children.
+
+        @param Key		Key given by the caller, returned by key and get_tuple.
+        @param Value		Data being stored in the Tree.
+        @param Owner		Token of the tree allowed to modify the node in place.
+        @param Sort_Key	Key used for sorting.
+        @param Monoid		AVLTreeMonoid of the tree.
+        '''
+        self._monoid = monoid
+        self._original_key = key
+        AVLTreeNode.__init__(self, sort_key, value, owner)
+
+
+    def _calculate_height(self):
+        '''Recalcualtes the height of the node, the size and the aggregate of its subtree'''
+        AVLTreeNode._calculate_height(self)
+        self._calculate_aggregate()
+
+    def _calculate_aggregate(self):
+        '''Recalculates the aggregate of the subtree from the children's aggregates.'''
+        monoid = self._monoid
+        aggregate = monoid.lift(self._original_key, self.value)
+        if self._left is not None:
+            aggregate = monoid.combine(self._left.aggregate, aggregate)
+        if self._right is not None:
+            aggregate = monoid.combine(aggregate, self._right.aggregate)
+        self.aggregate = aggregate
+
+    def _copy(self, owner):
+        '''Returns a copy of the node, sharing its children, that is owned by owner.'''
+        copy = AVLTreeKeyedNode._copy(self, owner)
+        copy.aggregate = self.aggregate
+        copy._monoid = self._monoid
+        return copy
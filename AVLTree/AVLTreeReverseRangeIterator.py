@@ -0,0 +1,92 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+from . import AVLTreeIterator
+from . import AVLTreeReverseOrderIterator
+
+class AVLTreeReverseRangeIterator(AVLTreeReverseOrderIterator.AVLTreeReverseOrderIterator):
+    '''
+    Iterates the keys of an AVL tree that fall between a lower and an upper
+    bound, in reverse order.  The iterator descends directly to the upper bound
+    to seed its stack, then streams entries until it passes the lower bound, so
+    a range of k entries costs O(log n + k).
+    
+    @param <TKey>	Generic type representing the key used for sorting.  Must be Comparable.
+    @param <TValue>	Generic type representing the data being stored.
+    '''
+    
+    def __init__(self, root, low=None, high=None, inclusive=(True, False), tree=None):
+        '''
+        Constructor.
+        
+        @param Root
+                    AVLTreeNode where the iteration will start.
+        @param low
+                    Lower bound of the range, None for no lower bound.
+        @param high
+                    Upper bound of the range, None for no upper bound.
+        @param inclusive
+                    Pair of booleans, whether the low and high bounds are
+                    included in the range.
+        @param Tree
+                    Optional AVLTree being iterated. If given, the iterator
+                    becomes invalid as soon as the tree is changed.
+        '''
+        self._low = low
+        self._high = high
+        self._inclusive = inclusive
+        AVLTreeReverseOrderIterator.AVLTreeReverseOrderIterator.__init__(self, root, tree)
+        
+    def _move_next(self):
+        '''
+        Moves the current pointer to the next element in the range.
+        
+        @return True if MoveNext was successful and there was a valid element to
+                move to, otherwise false.
+        @throws Exception
+        '''
+        if self._status == AVLTreeIterator.StatusEnum.BEFORE_FIRST:
+            self._stack.clear()
+            self._stack.append(None)
+            
+            # Stack every node on the path to the upper bound that is in range
+            current = self._root
+            high = self._high
+            while current is not None:
+                if high is None or current._key < high or (self._inclusive[1] and high == current._key):
+                    self._stack.append(current)
+                    current = current._right
+                else:
+                    current = current._left
+            
+            self._status = AVLTreeIterator.StatusEnum.OK
+            self._current = self._stack.pop()
+            if self._current is None:
+                self._status = AVLTreeIterator.StatusEnum.AFTER_LAST
+                self._stack.clear()
+                return False
+        
+        elif not AVLTreeReverseOrderIterator.AVLTreeReverseOrderIterator._move_next(self):
+            return False
+        
+        low = self._low
+        if low is not None and (self._current._key < low or (not self._inclusive[0] and low == self._current._key)):
+            self._status = AVLTreeIterator.StatusEnum.AFTER_LAST
+            self._current = None
+            self._stack.clear()
+            return False
+        
+        return True
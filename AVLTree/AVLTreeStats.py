@@ -0,0 +1,237 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+import time
+
+
+class AVLTreeStats():
+    '''
+    Counters collected by an AVLTree while its stats are enabled, see
+    AVLTree.enable_stats.
+    '''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        '''Sets every counter back to zero.'''
+        self.comparisons = 0
+        self.rotations = 0
+        self.double_rotations = 0
+        self.retrace_steps = 0
+        self.path_lengths = {}
+
+    def as_dict(self):
+        '''
+        Returns the counters as a dict. A double rotation is counted once in
+        double_rotations and not in single_rotations. path_lengths maps the
+        number of nodes on a search path to the number of searches.
+        '''
+        return {
+            'comparisons': self.comparisons,
+            'single_rotations': self.rotations - 2 * self.double_rotations,
+            'double_rotations': self.double_rotations,
+            'retrace_steps': self.retrace_steps,
+            'path_lengths': dict(sorted(self.path_lengths.items())),
+        }
+
+
+class _CountingKey():
+    '''
+    Sort key handed to the tree's own descents while its stats are on. Each
+    comparison made with it is counted, and the node keys it is compared
+    with are remembered, so the nodes on its search path are counted without
+    walking the path again.
+
+    Python tries the comparison methods of the node's key first when the
+    counting key is on the right, so keys must return NotImplemented when
+    compared with another type, as the built in types do. Attributes the key
+    reads from the other operand of its comparisons are passed through.
+    '''
+
+    __slots__ = ('key', '_stats', '_path')
+
+    def __init__(self, key, stats):
+        self.key = key
+        self._stats = stats
+        self._path = set()
+
+    def _counted(self, other):
+        '''Counts a comparison with other, and returns the key to compare with.'''
+        self._stats.comparisons += 1
+        if type(other) is _CountingKey:
+            return other.key
+        self._path.add(id(other))
+        return other
+
+    def __lt__(self, other):
+        return self.key < self._counted(other)
+
+    def __le__(self, other):
+        return self.key <= self._counted(other)
+
+    def __gt__(self, other):
+        return self.key > self._counted(other)
+
+    def __ge__(self, other):
+        return self.key >= self._counted(other)
+
+    def __eq__(self, other):
+        return self.key == self._counted(other)
+
+    def __ne__(self, other):
+        return self.key != self._counted(other)
+
+    __hash__ = None
+
+    def __getattr__(self, name):
+        return getattr(self.key, name)
+
+
+class AVLTreeStatsMixin():
+    '''
+    Instrumented versions of the AVLTree methods that the stats count.
+
+    enable_stats switches a tree's class to a subclass of its class with this
+    mixin first, and disable_stats switches it back, so a tree whose stats are
+    off runs the plain methods and pays nothing for them. While stats are on
+    every sort key the tree makes from a caller's key is a _CountingKey, so
+    the comparisons are counted where the descents, merges and splits make
+    them. The counters are not synchronized between threads.
+    '''
+
+    def _sort_key(self, key):
+        probe = _CountingKey(super()._sort_key(key), self._stats)
+        self._stats_probe = probe
+        return probe
+
+    def _stats_path(self):
+        '''Counts the search path of the last sort key made by the tree.'''
+        length = len(self._stats_probe._path)
+        path_lengths = self._stats.path_lengths
+        path_lengths[length] = path_lengths.get(length, 0) + 1
+
+    def _stats_timed(self, operation, function, *args):
+        '''Calls function(*args) and reports its wall time to the timing hook.'''
+        if self._stats_hook is None:
+            return function(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self._stats_hook(operation, time.perf_counter() - start)
+
+    def __getitem__(self, key):
+        if type(key) is slice:
+            return super().__getitem__(key)
+        return self._stats_timed('getitem', super().__getitem__, key)
+
+    def get(self, key, default_value):
+        return self._stats_timed('get', super().get, key, default_value)
+
+    def _find(self, key):
+        found = super()._find(key)
+        self._stats_path()
+        return found
+
+    def __setitem__(self, key, value):
+        self._stats_timed('setitem', super().__setitem__, key, value)
+
+    def _upsert(self, key, value):
+        found = super()._upsert(key, value)
+        self._stats_path()
+        return found
+
+    def remove(self, key):
+        return self._stats_timed('remove', self._stats_remove, key)
+
+    def _stats_remove(self, key):
+        removed = super().remove(key)
+        self._stats_path()
+        return removed
+
+    def _split_node(self, node, key):
+        # The set operations split at the keys of the other tree's nodes
+        if type(key) is not _CountingKey:
+            key = _CountingKey(key, self._stats)
+        return super()._split_node(node, key)
+
+    def _merge_sorted(self, node, pairs, keys, low, high):
+        # update merges its batch by bisecting the sort keys of the batch
+        if low < high and type(keys[low]) is not _CountingKey:
+            keys = [_CountingKey(key, self._stats) for key in keys]
+        return super()._merge_sorted(node, pairs, keys, low, high)
+
+    def _rebuild_merged(self, pairs, keys):
+        return super()._rebuild_merged(pairs, [_CountingKey(key, self._stats) for key in keys])
+
+    def _reaggregate(self, key):
+        return super()._reaggregate(_CountingKey(key, self._stats))
+
+    def _new_node(self, key, value, sort_key):
+        if type(sort_key) is _CountingKey:
+            sort_key = sort_key.key
+        return super()._new_node(key, value, sort_key)
+
+    def _retrace(self, stack, delta):
+        # Retracing pops the nodes it retraces, and the None below the root
+        # if it reaches the root
+        before = len(stack)
+        super()._retrace(stack, delta)
+        self._stats.retrace_steps += before - len(stack) - (1 if len(stack) == 0 else 0)
+
+    def _rotate_subtree_left(self, node):
+        self._stats.rotations += 1
+        return super()._rotate_subtree_left(node)
+
+    def _rotate_subtree_right(self, node):
+        self._stats.rotations += 1
+        return super()._rotate_subtree_right(node)
+
+    def _rotate_left_right(self, node, parent):
+        self._stats.double_rotations += 1
+        return super()._rotate_left_right(node, parent)
+
+    def _rotate_right_left(self, node, parent):
+        self._stats.double_rotations += 1
+        return super()._rotate_right_left(node, parent)
+
+    def _rebalance(self, node):
+        # The joins behind split, join, remove_range and the set operations
+        # make their double rotations from two subtree rotations
+        balance = node.balance_factor
+        if (balance > 1 and node._left.balance_factor < 0) or (balance < -1 and node._right.balance_factor > 0):
+            self._stats.double_rotations += 1
+        return super()._rebalance(node)
+
+    def _new_tree(self, root=None):
+        # Trees made from this one, by split, join or the set operations,
+        # start with their stats off
+        tree = super()._new_tree(root)
+        tree.__class__ = tree._stats_base
+        return tree
+
+
+# Instrumented subclass of each tree class, created on first use
+_instrumented = {}
+
+
+def instrumented_class(cls):
+    '''Returns the subclass of cls that puts AVLTreeStatsMixin first.'''
+    if cls not in _instrumented:
+        _instrumented[cls] = type(f'Instrumented{cls.__name__}', (AVLTreeStatsMixin, cls), {'_stats_base': cls})
+    return _instrumented[cls]
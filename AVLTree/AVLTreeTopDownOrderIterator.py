@@ -14,6 +14,7 @@ A PARTICULAR PURPOSE. See the GNU General Public License for more details.
 You should have received a copy of the GNU General Public License along with
 the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
 '''
+from collections import deque
 from . import AVLTreeIterator
 
 class AVLTreeTopDownOrderIterator(AVLTreeIterator.AVLTreeIterator):
@@ -33,9 +34,9 @@ class AVLTreeTopDownOrderIterator(AVLTreeIterator.AVLTreeIterator):
                Generic type representing the data being stored.
     '''
     
-    def __init__(self, root):
-        self.queue = []
-        AVLTreeIterator.AVLTreeIterator.__init__(self, root)
+    def __init__(self, root, tree=None):
+        self.queue = deque()
+        AVLTreeIterator.AVLTreeIterator.__init__(self, root, tree)
         
     def _move_next(self):
         '''
@@ -66,7 +67,7 @@ class AVLTreeTopDownOrderIterator(AVLTreeIterator.AVLTreeIterator):
             return False
         
         if len(self.queue) > 0:
-            self._current = self.queue.pop(0)  # POP first element
+            self._current = self.queue.popleft()  # POP first element
             if self._current._left is not None:
                 self.queue.append(self._current._left)
             if self._current._right is not None:
@@ -0,0 +1,36 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+from enum import Enum
+
+class AVLTreeTraversalMethod(Enum):
+    '''enum used to determine the order of Iteration traversal of an AVLTree.'''
+    IN_ORDER = 1
+    '''Iterates an AVL tree in natural order represented by the Key.'''
+
+    REVERSE_ORDER = 2
+    '''Iterates an AVL tree in reverse order represented by the Key.'''
+
+    TOP_DOWN = 3
+    '''
+    Iterates an AVL tree in top down order. This iterator traverses the
+    AVLTree in special way that is useful for serializing or saving the tree
+    for the purpose of reloading another tree. Inserting the elements into a
+    tree in the order they are iterated here is the fastest way to load the
+    tree without necessary and costly sorting. AVLTree.dump and AVLTree.load
+    are faster still, load rebuilds the tree without any comparisons.
+    '''
@@ -0,0 +1,67 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+
+class AVLTreeView():
+    '''
+    Lazy view of the keys, values or key/value pairs of an AVL tree, returned
+    by the tree's keys(), values() and items().
+
+    Each iteration is a generator loop over the tree's nodes that yields the
+    requested field directly, so keys() and values() build no tuples. The
+    order belongs to the view, not to the tree, so views in different orders
+    never interfere through tree.traversal_method. Like the tree's iterators,
+    an iteration raises RuntimeError once the tree is changed.
+    '''
+
+    def __init__(self, tree, kind, order):
+        '''
+        Constructor.
+
+        @param Tree
+                    AVL tree being viewed.
+        @param Kind
+                    'keys', 'values' or 'items'.
+        @param Order
+                    AVLTreeTraversalMethod of the iteration.
+        '''
+        self._tree = tree
+        self._kind = kind
+        self._order = order
+
+    def __len__(self):
+        return len(self._tree)
+
+    def __contains__(self, item):
+        '''
+        Tells whether the view holds item. A key or a key/value pair is looked
+        up in the tree in O(log n), a value is searched for in O(n).
+        '''
+        if self._kind == 'values':
+            return any(value is item or value == item for value in self)
+        return self._tree._view_contains(self._kind, item)
+
+    def __iter__(self):
+        return self._tree._view_iter(self._kind, self._order, False)
+
+    def __reversed__(self):
+        '''
+        Iterates the view in the opposite order.
+
+        @throws TypeError if the view is in top down order.
+        '''
+        return self._tree._view_iter(self._kind, self._order, True)
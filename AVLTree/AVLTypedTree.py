@@ -0,0 +1,504 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+from . import AVLTreeView
+from .AVLTreeTraversalMethod import AVLTreeTraversalMethod
+
+# array typecodes of the supported key types
+_KEY_TYPECODES = {int: 'q', float: 'd'}
+
+# Index of a missing child
+_NIL = -1
+
+
+class AVLTypedTree():
+    '''
+    AVL Balanced Binary Search Tree specialised for int or float keys.
+
+    Created by AVLTree(key_type=int) or AVLTree(key_type=float). Instead of a
+    Python object per node, the tree keeps its nodes in array module columns:
+    the keys as native int64 or float64, the child links as int32 indices and
+    the heights as int8, with the values in a list. A node costs 17 bytes of
+    columns plus a list slot, and the search, insert and remove loops compare
+    native numbers read straight from the key column.
+
+    Removed nodes are kept on a free list, threaded through the left column,
+    and reused by later inserts.
+
+    Once lookups outnumber half the entries since the last insert or remove, the
+    tree also keeps a sorted copy of the key column, and lookups bisect it in
+    C instead of descending the tree in Python. The copy is dropped by the
+    next insert or remove; replacing a value keeps it.
+
+    @param <TValue>
+               Generic type representing the data being stored.
+    '''
+
+    def __init__(self, key_type=int):
+        '''
+        Creates a new, empty AVLTypedTree that defaults to InOrder traversal.
+
+        @param key_type
+                   int for int64 keys, or float for float64 keys.
+
+        @throws ValueError if key_type is not int or float.
+        '''
+        if key_type not in _KEY_TYPECODES:
+            raise ValueError(f'! Unsupported key_type {key_type}, use int or float !')
+        self._key_type = key_type
+        self.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+        self._version = 0
+        self.clear()
+
+    def __len__(self):
+        '''Returns the number of elements in the tree.'''
+        return self._count
+
+    @property
+    def key_type(self):
+        '''Returns the type of the keys, int or float.'''
+        return self._key_type
+
+    @property
+    def height(self):
+        '''Returns the current height of the tree.'''
+        return 0 if self._root == _NIL else self._heights[self._root]
+
+    @property
+    def balance_factor(self):
+        '''Returns the balance factor of the tree.'''
+        return 0 if self._root == _NIL else self._balance_factor(self._root)
+
+    def clear(self):
+        '''Clear the contents of the tree'''
+        self._keys = array(_KEY_TYPECODES[self._key_type])
+        self._values = []
+        self._left = array('i')
+        self._right = array('i')
+        self._heights = array('b')
+        self._root = _NIL
+        self._free = _NIL
+        self._count = 0
+        self._version += 1
+        self._invalidate()
+
+    def _invalidate(self):
+        '''Drops the sorted copy of the keys after a change to the keys.'''
+        # (sorted keys, node index of each key), or None
+        self._sorted = None
+        self._reads = 0
+
+    def __getitem__(self, key):
+        '''
+        Gets the value stored at key.
+
+        @param Key Key to locate in the tree.
+
+        @return value stored at key.
+
+        @throws IndexError if no node exists at key
+        '''
+        found = self._find(key)
+        if found == _NIL:
+            raise IndexError(f'! Key {key} not present in Tree !')
+        return self._values[found]
+
+    def get(self, key, default_value):
+        '''
+        Gets the value stored at key.
+
+        @param Key Key to locate in the tree.
+
+        @return value stored at key, or default value if key is not found.
+        '''
+        found = self._find(key)
+        return default_value if found == _NIL else self._values[found]
+
+    def _find(self, key):
+        '''
+        Locates the node holding key, by bisecting the sorted copy of the keys
+        if there is one, otherwise by a descent with one comparison per level.
+
+        @return index of the node holding key, or _NIL if key is not found.
+        '''
+        if self._sorted is None:
+            self._reads += 1
+            if self._reads > self._count >> 1:
+                self._build_sorted()
+        if self._sorted is not None:
+            sorted_keys, nodes = self._sorted
+            i = bisect_left(sorted_keys, key)
+            if i < len(sorted_keys) and not key < sorted_keys[i]:
+                return nodes[i]
+            return _NIL
+
+        keys = self._keys
+        left = self._left
+        right = self._right
+        found = _NIL
+        current = self._root
+
+        while current != _NIL:
+            if key < keys[current]:
+                current = left[current]
+            else:
+                found = current
+                current = right[current]
+
+        if found == _NIL or keys[found] < key:
+            return _NIL
+        return found
+
+    def _build_sorted(self):
+        '''Builds the sorted copy of the key column with an in order walk.'''
+        left = self._left
+        right = self._right
+        nodes = array('i')
+        stack = []
+        current = self._root
+        while current != _NIL or len(stack) > 0:
+            while current != _NIL:
+                stack.append(current)
+                current = left[current]
+            current = stack.pop()
+            nodes.append(current)
+            current = right[current]
+        keys = self._keys
+        self._sorted = (array(keys.typecode, [keys[node] for node in nodes]), nodes)
+
+    def __setitem__(self, key, value):
+        '''
+        Add a key/value pair to the tree, or replace the value stored at key.
+
+        @param Key
+                   int or float key used for ordering the tree entries.
+        @param Value
+                   Value to be stored.
+
+        @throws TypeError if key can not be stored as the tree's key_type.
+        '''
+        keys = self._keys
+        left = self._left
+        right = self._right
+        path = []
+        found = _NIL
+        go_left = False
+        current = self._root
+
+        while current != _NIL:
+            path.append(current)
+            go_left = key < keys[current]
+            if go_left:
+                current = left[current]
+            else:
+                found = current
+                current = right[current]
+
+        if found != _NIL and not keys[found] < key:
+            self._values[found] = value
+            return
+
+        node = self._allocate(key, value)
+        self._count += 1
+        self._version += 1
+        if self._sorted is not None or self._reads > 0:
+            self._invalidate()
+        if len(path) == 0:
+            self._root = node
+        elif go_left:
+            left[path[-1]] = node
+        else:
+            right[path[-1]] = node
+
+        self._retrace(path)
+
+    def remove(self, key):
+        '''
+        Remove an entry from the tree.
+
+        @param Key
+                   Key of entry to remove.
+        @return tuple representing the key/value pair that was removed, or
+                None if key is not found.
+        '''
+        keys = self._keys
+        left = self._left
+        right = self._right
+        path = []
+        found = 0
+        current = self._root
+
+        while current != _NIL:
+            path.append(current)
+            if key < keys[current]:
+                current = left[current]
+            else:
+                found = len(path)
+                current = right[current]
+
+        if found == 0 or keys[path[found - 1]] < key:
+            return None
+
+        del path[found:]
+        node = path[-1]
+        removed = (keys[node], self._values[node])
+
+        if left[node] != _NIL and right[node] != _NIL:
+            # Move the successor's entry into node, then unlink the successor,
+            # which has no left child
+            current = right[node]
+            while left[current] != _NIL:
+                path.append(current)
+                current = left[current]
+            keys[node] = keys[current]
+            self._values[node] = self._values[current]
+            node = current
+        else:
+            path.pop()
+
+        child = left[node] if right[node] == _NIL else right[node]
+        if len(path) == 0:
+            self._root = child
+        elif left[path[-1]] == node:
+            left[path[-1]] = child
+        else:
+            right[path[-1]] = child
+
+        self._release(node)
+        self._count -= 1
+        self._version += 1
+        if self._sorted is not None or self._reads > 0:
+            self._invalidate()
+        self._retrace(path)
+        return removed
+
+    def get_min_key(self):
+        '''Returns the key with the minimum value.'''
+        current = self._root
+        if current == _NIL:
+            return None
+        while self._left[current] != _NIL:
+            current = self._left[current]
+        return self._keys[current]
+
+    def get_max_key(self):
+        '''Returns the key with the maximum value'''
+        current = self._root
+        if current == _NIL:
+            return None
+        while self._right[current] != _NIL:
+            current = self._right[current]
+        return self._keys[current]
+
+    def _allocate(self, key, value):
+        '''Stores a new leaf node, reusing a free slot if there is one, and returns its index.'''
+        node = self._free
+        if node == _NIL:
+            self._keys.append(key)
+            node = len(self._keys) - 1
+            self._values.append(value)
+            self._left.append(_NIL)
+            self._right.append(_NIL)
+            self._heights.append(0)
+        else:
+            self._keys[node] = key
+            self._free = self._left[node]
+            self._values[node] = value
+            self._left[node] = _NIL
+            self._right[node] = _NIL
+            self._heights[node] = 0
+        return node
+
+    def _release(self, node):
+        '''Puts the slot of an unlinked node on the free list.'''
+        self._values[node] = None
+        self._left[node] = self._free
+        self._free = node
+
+    def _balance_factor(self, node):
+        '''Returns the height of node's left subtree minus the height of its right subtree.'''
+        l = self._left[node]
+        r = self._right[node]
+        return (-1 if l == _NIL else self._heights[l]) - (-1 if r == _NIL else self._heights[r])
+
+    def _calculate_height(self, node):
+        '''Recalculates the height of node from the heights of its children.'''
+        l = self._left[node]
+        r = self._right[node]
+        lh = -1 if l == _NIL else self._heights[l]
+        rh = -1 if r == _NIL else self._heights[r]
+        self._heights[node] = (lh if lh > rh else rh) + 1
+
+    def _retrace(self, path):
+        '''
+        Goes back up the tree along a search path, resetting heights and
+        rebalancing each node on the way. Stops at the first node whose height
+        is unchanged, since nothing above it can have changed either.
+
+        @param path list of the node indices on the path from the root down.
+        '''
+        left = self._left
+        right = self._right
+        heights = self._heights
+        while len(path) > 0:
+            node = path.pop()
+            l = left[node]
+            r = right[node]
+            lh = -1 if l == _NIL else heights[l]
+            rh = -1 if r == _NIL else heights[r]
+            height = heights[node]
+
+            if lh > rh + 1:
+                if self._balance_factor(l) < 0:
+                    left[node] = self._rotate_left(l)
+                subtree = self._rotate_right(node)
+            elif rh > lh + 1:
+                if self._balance_factor(r) > 0:
+                    right[node] = self._rotate_right(r)
+                subtree = self._rotate_left(node)
+            else:
+                new_height = (lh if lh > rh else rh) + 1
+                if new_height == height:
+                    return
+                heights[node] = new_height
+                continue
+
+            if len(path) == 0:
+                self._root = subtree
+            elif left[path[-1]] == node:
+                left[path[-1]] = subtree
+            else:
+                right[path[-1]] = subtree
+            if heights[subtree] == height:
+                return
+
+    def _rotate_right(self, node):
+        '''Rotates the subtree rooted at node to the right and returns its new root.'''
+        child = self._left[node]
+        self._left[node] = self._right[child]
+        self._right[child] = node
+        self._calculate_height(node)
+        self._calculate_height(child)
+        return child
+
+    def _rotate_left(self, node):
+        '''Rotates the subtree rooted at node to the left and returns its new root.'''
+        child = self._right[node]
+        self._right[node] = self._left[child]
+        self._left[child] = node
+        self._calculate_height(node)
+        self._calculate_height(child)
+        return child
+
+    def keys(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the keys, see AVLTree.keys.'''
+        return AVLTreeView.AVLTreeView(self, 'keys', order)
+
+    def values(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the values, see AVLTree.values.'''
+        return AVLTreeView.AVLTreeView(self, 'values', order)
+
+    def items(self, order=AVLTreeTraversalMethod.IN_ORDER):
+        '''Returns a lazy view of the key/value pairs, see AVLTree.items.'''
+        return AVLTreeView.AVLTreeView(self, 'items', order)
+
+    def _view_iter(self, kind, order, reverse):
+        '''
+        Returns an iterator for an AVLTreeView, see AVLTree._view_iter.
+
+        @throws TypeError if reverse is True and order is TOP_DOWN.
+        '''
+        if order is AVLTreeTraversalMethod.TOP_DOWN:
+            if reverse:
+                raise TypeError('! A top down view can not be reversed !')
+            nodes = self._top_down_nodes(self._version)
+        elif (order is AVLTreeTraversalMethod.REVERSE_ORDER) != reverse:
+            nodes = self._ordered_nodes(self._right, self._left, self._version)
+        else:
+            nodes = self._ordered_nodes(self._left, self._right, self._version)
+
+        if kind == 'keys':
+            return map(self._keys.__getitem__, nodes)
+        if kind == 'values':
+            return map(self._values.__getitem__, nodes)
+        return map(self._item, nodes)
+
+    def _view_contains(self, kind, item):
+        '''Returns whether an AVLTreeView holds item, see AVLTree._view_contains.'''
+        if kind == 'keys':
+            return self._find(item) != _NIL
+        if type(item) is not tuple or len(item) != 2:
+            return False
+        found = self._find(item[0])
+        return found != _NIL and (self._values[found] is item[1] or self._values[found] == item[1])
+
+    def _item(self, node):
+        '''Returns the key/value pair of a node.'''
+        return (self._keys[node], self._values[node])
+
+    def _ordered_nodes(self, first, second, version):
+        '''
+        Yields the node indices of an in order walk, or a reverse order walk
+        when first and second are the right and left columns.
+
+        @param version the tree's version when the iterator was created.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        if self._version != version:
+            raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+        stack = []
+        current = self._root
+        while current != _NIL or len(stack) > 0:
+            while current != _NIL:
+                stack.append(current)
+                current = first[current]
+            current = stack.pop()
+            yield current
+            if self._version != version:
+                raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+            current = second[current]
+
+    def _top_down_nodes(self, version):
+        '''
+        Yields the node indices level by level, from the root down.
+
+        @param version the tree's version when the iterator was created.
+
+        @throws RuntimeError if the tree is changed during the iteration.
+        '''
+        if self._version != version:
+            raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+        queue = deque()
+        if self._root != _NIL:
+            queue.append(self._root)
+        while len(queue) > 0:
+            current = queue.popleft()
+            yield current
+            if self._version != version:
+                raise RuntimeError('! AVL Tree has changed, this Iterator is no longer valid !')
+            if self._left[current] != _NIL:
+                queue.append(self._left[current])
+            if self._right[current] != _NIL:
+                queue.append(self._right[current])
+
+    def __iter__(self):
+
+        return self._view_iter('items', self.traversal_method, False)
@@ -0,0 +1,351 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+import threading
+from contextlib import contextmanager, ExitStack
+from .AVLTree import AVLTree
+
+class ReadWriteLock():
+    '''
+    Lock allowing many concurrent readers or a single writer.
+
+    Waiting writers are preferred over new readers, so a steady stream of
+    readers can not starve a writer. The lock is reentrant: a thread holding
+    it may acquire it again for reading or writing, except that a thread
+    holding only a read lock can not upgrade it to a write lock.
+    '''
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        '''Blocks until the lock can be held for reading.'''
+        me = threading.get_ident()
+        depth = getattr(self._local, 'read_depth', 0)
+        if self._writer == me or depth > 0:
+            self._local.read_depth = depth + 1
+            return
+
+        with self._condition:
+            while self._writer is not None or self._waiting_writers > 0:
+                self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+
+    def release_read(self):
+        '''Releases a lock held for reading.'''
+        self._local.read_depth -= 1
+        if self._local.read_depth > 0 or self._writer == threading.get_ident():
+            return
+
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        '''
+        Blocks until the lock can be held for writing.
+
+        @throws RuntimeError if the calling thread holds only a read lock
+        '''
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'read_depth', 0) > 0:
+            raise RuntimeError('! Can not upgrade a read lock to a write lock !')
+
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers > 0:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        '''Releases a lock held for writing.'''
+        self._write_depth -= 1
+        if self._write_depth > 0:
+            return
+
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def reading(self):
+        '''Context manager holding the lock for reading.'''
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        '''Context manager holding the lock for writing.'''
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ConcurrentAVLTree(AVLTree):
+    '''
+    Thread safe AVL Balanced Binary Search Tree.
+
+    Lookups hold a shared read lock, so any number of them run together, and
+    changes hold an exclusive write lock. Iteration does not hold the lock at
+    all: __iter__ and irange take an O(1) snapshot of the tree and iterate the
+    snapshot, so iterators see a consistent view and never block writers.
+
+    @param <TKey>
+               Generic type representing the key used for sorting. Must
+               implement <, =, and >.
+    @param <TValue>
+               Generic type representing the data being stored.
+    '''
+
+    def __init__(self, key=None, aggregate=None, max_size=None, evict='min', on_evict=None, clock=None):
+        '''
+        Creates a new, empty ConcurrentAVLTree.
+
+        @param key Optional key function, see AVLTree.
+        @param aggregate Optional aggregate monoid, see AVLTree.
+        @param max_size Optional capacity, see AVLTree.
+        @param evict Eviction policy, see AVLTree.
+        @param on_evict Optional eviction callback, see AVLTree. It is called
+                        while the write lock is held, so it must not use the tree.
+        @param clock Timestamp function of ttl mode, see AVLTree.
+        '''
+        self._lock = ReadWriteLock()
+        AVLTree.__init__(self, key, aggregate=aggregate, max_size=max_size, evict=evict, on_evict=on_evict, clock=clock)
+
+    def __len__(self):
+        with self._lock.reading():
+            return AVLTree.__len__(self)
+
+    @property
+    def height(self):
+        with self._lock.reading():
+            return AVLTree.height.fget(self)
+
+    @property
+    def balance_factor(self):
+        with self._lock.reading():
+            return AVLTree.balance_factor.fget(self)
+
+    def __getitem__(self, key):
+        if type(key) is slice:
+            return AVLTree.__getitem__(self, key)
+        with self._lock.reading():
+            return AVLTree.__getitem__(self, key)
+
+    def get(self, key, default_value):
+        with self._lock.reading():
+            return AVLTree.get(self, key, default_value)
+
+    def get_many(self, keys, default_value=None, return_mask=False):
+        with self._lock.reading():
+            return AVLTree.get_many(self, keys, default_value, return_mask)
+
+    def get_min_key(self):
+        with self._lock.reading():
+            return AVLTree.get_min_key(self)
+
+    def get_max_key(self):
+        with self._lock.reading():
+            return AVLTree.get_max_key(self)
+
+    def floor(self, key):
+        with self._lock.reading():
+            return AVLTree.floor(self, key)
+
+    def ceiling(self, key):
+        with self._lock.reading():
+            return AVLTree.ceiling(self, key)
+
+    def lower(self, key):
+        with self._lock.reading():
+            return AVLTree.lower(self, key)
+
+    def higher(self, key):
+        with self._lock.reading():
+            return AVLTree.higher(self, key)
+
+    def rank(self, key):
+        with self._lock.reading():
+            return AVLTree.rank(self, key)
+
+    @property
+    def aggregate(self):
+        with self._lock.reading():
+            return AVLTree.aggregate.fget(self)
+
+    def reduce(self, low=None, high=None, inclusive=(True, False)):
+        with self._lock.reading():
+            return AVLTree.reduce(self, low, high, inclusive)
+
+    def select(self, index):
+        with self._lock.reading():
+            return AVLTree.select(self, index)
+
+    def peekitem(self, index=-1):
+        with self._lock.reading():
+            return AVLTree.peekitem(self, index)
+
+    def copy(self):
+        with self._lock.reading():
+            return AVLTree.copy(self)
+
+    def dump(self, fileobj, key_codec=None, value_codec=None):
+        # Writes one consistent view, the header's count included
+        AVLTree.dump(self.snapshot(), fileobj, key_codec, value_codec)
+
+    def __setitem__(self, key, value):
+        with self._lock.writing():
+            AVLTree.__setitem__(self, key, value)
+
+    def remove(self, key):
+        with self._lock.writing():
+            return AVLTree.remove(self, key)
+
+    def remove_many(self, keys):
+        with self._lock.writing():
+            return AVLTree.remove_many(self, keys)
+
+    def remove_range(self, low=None, high=None, inclusive=(True, False), return_items=False):
+        with self._lock.writing():
+            return AVLTree.remove_range(self, low, high, inclusive, return_items)
+
+    def pop_min(self):
+        with self._lock.writing():
+            return AVLTree.pop_min(self)
+
+    def pop_max(self):
+        with self._lock.writing():
+            return AVLTree.pop_max(self)
+
+    def update(self, items):
+        with self._lock.writing():
+            AVLTree.update(self, items)
+
+    def expire_until(self, key):
+        with self._lock.writing():
+            return AVLTree.expire_until(self, key)
+
+    def expire(self):
+        with self._lock.writing():
+            return AVLTree.expire(self)
+
+    def clear(self):
+        with self._lock.writing():
+            AVLTree.clear(self)
+
+    def split(self, key):
+        with self._lock.writing():
+            return AVLTree.split(self, key)
+
+    @staticmethod
+    def join(left, right, middle=None):
+        # Lock the concurrent trees in a fixed order, so two joins of the same
+        # trees in opposite order can not deadlock. A plain AVLTree argument
+        # has no lock, its caller keeps other threads away from it.
+        trees = {id(tree): tree for tree in (left, right) if isinstance(tree, ConcurrentAVLTree)}
+        with ExitStack() as stack:
+            for _, tree in sorted(trees.items()):
+                stack.enter_context(tree._lock.writing())
+            return AVLTree.join(left, right, middle)
+
+    def snapshot(self):
+        # Taking a snapshot changes the ownership token of the live tree.
+        with self._lock.writing():
+            return AVLTree.snapshot(self)
+
+    def union(self, other, resolve=None):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.union(self, other, resolve)
+
+    def intersection(self, other, resolve=None):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.intersection(self, other, resolve)
+
+    def difference(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.difference(self, other)
+
+    def symmetric_difference(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.symmetric_difference(self, other)
+
+    def __ior__(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.__ior__(self, other)
+
+    def __iand__(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.__iand__(self, other)
+
+    def __isub__(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.__isub__(self, other)
+
+    def __ixor__(self, other):
+        other = ConcurrentAVLTree._stable(other)
+        with self._lock.writing():
+            return AVLTree.__ixor__(self, other)
+
+    def irange(self, low=None, high=None, inclusive=(True, False), reverse=False):
+        return AVLTree.irange(self.snapshot(), low, high, inclusive, reverse)
+
+    def __iter__(self):
+        return AVLTree.__iter__(self.snapshot())
+
+    def _view_iter(self, kind, order, reverse):
+        return AVLTree._view_iter(self.snapshot(), kind, order, reverse)
+
+    def _view_contains(self, kind, item):
+        with self._lock.reading():
+            return AVLTree._view_contains(self, kind, item)
+
+    def _in_order(self):
+        return AVLTree._in_order(self.snapshot())
+
+    @staticmethod
+    def _stable(other):
+        '''
+        Returns a view of other that no other thread can change, so it can be
+        read without holding its lock.
+        '''
+        if isinstance(other, ConcurrentAVLTree):
+            return other.snapshot()
+        return other
@@ -0,0 +1,338 @@
+'''
+Copyright 2024 Jim Haslett
+
+This file is part of the 11c.dev AVL Balanced Binary Search Tree implementation.
+
+AVL Balanced Binary Search Tree is free software: you can redistribute it and/or modify it
+under the terms of the GNU General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+AVL Balanced Binary Search Tree is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+the AVL Balanced Binary Search Tree. If not, see <https:// www.gnu.org/licenses/>.
+'''
+
+import mmap
+import struct
+import sys
+from . import AVLTreeCodec
+
+_FILE_MAGIC = b'AVLF'
+_FILE_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sH')
+_FILE_COUNT = struct.Struct('<Q')
+_OFFSET = struct.Struct('<Q')
+_WRITE_BUFFER_SIZE = 1 << 16
+
+# Struct codecs whose columns can be read in place through memoryview.cast
+_NATIVE_FORMATS = {'int64': 'q', 'float64': 'd'} if sys.byteorder == 'little' else {}
+
+
+def _trailing_ones(k):
+    '''Returns the number of trailing one bits of k.'''
+    return (k ^ (k + 1)).bit_length() - 1
+
+
+def _trailing_zeros(k):
+    '''Returns the number of trailing zero bits of k, which must not be 0.'''
+    return (k & -k).bit_length() - 1
+
+
+class _Column():
+    '''
+    Read only access to a column of keys or values in a FrozenAVLTree file.
+    Entry i is decoded from the mapped file only when it is read.
+    '''
+
+    def __init__(self, buffer, offset, count, codec):
+        '''
+        @param buffer mapped file.
+        @param offset position of the column in the file.
+        @param count number of entries in the column.
+        @param codec AVLTreeCodec of the entries.
+        '''
+        self._buffer = buffer
+        self._codec = codec
+        self._native = None
+        if codec.size is not None:
+            self._base = offset
+            self.end = offset + count * codec.size
+            if codec.name in _NATIVE_FORMATS:
+                self._native = memoryview(buffer)[offset:self.end].cast(_NATIVE_FORMATS[codec.name])
+        else:
+            self._offsets = offset
+            self._base = offset + (count + 1) * _OFFSET.size
+            self.end = self._base + _OFFSET.unpack_from(buffer, offset + count * _OFFSET.size)[0]
+        self.end += -self.end % 8
+
+    def __getitem__(self, i):
+        if self._native is not None:
+            return self._native[i]
+        size = self._codec.size
+        if size is not None:
+            start = self._base + i * size
+            return self._codec.decode(self._buffer[start:start + size])
+        start, end = struct.unpack_from('<QQ', self._buffer, self._offsets + i * _OFFSET.size)
+        return self._codec.decode(self._buffer[self._base + start:self._base + end])
+
+    def release(self):
+        '''Releases the view on the mapped file, so it can be closed.'''
+        if self._native is not None:
+            self._native.release()
+            self._native = None
+
+
+class FrozenAVLTree():
+    '''
+    Read only AVL tree stored in a memory mapped file.
+
+    FrozenAVLTree.write lays the entries of an AVLTree out in Eytzinger order,
+    the breadth first order of a perfectly balanced tree, with the keys in one
+    fixed width column or an offsets table, and the values in another.
+    Opening the file maps it without reading or decoding it, so startup is
+    immediate no matter the size, and processes mapping the same file share
+    its pages. A search touches the keys of one root to leaf path, and the top
+    levels of every search share the same few cache lines.
+
+    @param <TKey>
+               Generic type representing the key used for sorting. Must
+               implement <, =, and >.
+    @param <TValue>
+               Generic type representing the data being stored.
+    '''
+
+    def __init__(self, path):
+        '''
+        Opens a file written by FrozenAVLTree.write.
+
+        @param path Path of the file.
+
+        @throws ValueError if the file is not a frozen tree file, or uses an
+                unknown format version or codec.
+        '''
+        with open(path, 'rb') as fileobj:
+            self._buffer = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version = _FILE_HEADER.unpack_from(self._buffer, 0)
+            if magic != _FILE_MAGIC:
+                raise ValueError('! Not a frozen AVL Tree file !')
+            if version != _FILE_VERSION:
+                raise ValueError(f'! Unsupported frozen AVL Tree file version {version} !')
+
+            position = _FILE_HEADER.size
+            codecs = []
+            for i in range(2):
+                length = self._buffer[position]
+                codecs.append(AVLTreeCodec.get_codec(self._buffer[position + 1:position + 1 + length].decode('ascii')))
+                position += 1 + length
+            self._count = _FILE_COUNT.unpack_from(self._buffer, position)[0]
+            position += _FILE_COUNT.size
+            position += -position % 8
+        except BaseException:
+            self._buffer.close()
+            raise
+
+        self._keys = _Column(self._buffer, position, self._count, codecs[0])
+        self._values = _Column(self._buffer, self._keys.end, self._count, codecs[1])
+
+    @staticmethod
+    def write(tree, fileobj, key_codec=None, value_codec=None):
+        '''
+        Writes an AVLTree to a binary file in the frozen layout. The entries
+        are gathered in order first, and their Eytzinger order computed, so
+        this takes memory for one reference and one index per entry. The
+        columns are encoded and written in chunks; a variable size column is
+        encoded twice, once to fill its offsets table and once to write it.
+
+        @param tree
+                   AVLTree to write.
+        @param fileobj
+                   Binary file object, open for writing.
+        @param key_codec
+                   AVLTreeCodec used for the keys. By default the most compact
+                   built in codec that fits every key is chosen.
+        @param value_codec
+                   AVLTreeCodec used for the values, chosen the same way.
+
+        @throws ValueError if tree has a key function, the frozen tree orders
+                its keys naturally.
+        '''
+        if tree._key_function is not None:
+            raise ValueError('! A tree with a key function can not be frozen !')
+        items = list(tree._in_order())
+        count = len(items)
+        if key_codec is None:
+            key_codec = AVLTreeCodec.detect_codec(item[0] for item in items)
+        if value_codec is None:
+            value_codec = AVLTreeCodec.detect_codec(item[1] for item in items)
+
+        # order[k - 1] is the sorted position of the entry at Eytzinger index k
+        order = [0] * count
+        position = 0
+        stack = []
+        k = 1
+        while k <= count or len(stack) > 0:
+            while k <= count:
+                stack.append(k)
+                k = 2 * k
+            k = stack.pop()
+            order[k - 1] = position
+            position += 1
+            k = 2 * k + 1
+
+        header = bytearray(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION))
+        for codec in (key_codec, value_codec):
+            name = codec.name.encode('ascii')
+            header.append(len(name))
+            header += name
+        header += _FILE_COUNT.pack(count)
+        header += bytes(-len(header) % 8)
+        fileobj.write(header)
+
+        for codec, field in ((key_codec, 0), (value_codec, 1)):
+            if codec.size is None:
+                # The offsets table comes before the column it indexes
+                buffer = bytearray(_OFFSET.pack(0))
+                end = 0
+                for i in order:
+                    end += len(codec.encode(items[i][field]))
+                    buffer += _OFFSET.pack(end)
+                    if len(buffer) >= _WRITE_BUFFER_SIZE:
+                        fileobj.write(buffer)
+                        buffer.clear()
+                fileobj.write(buffer)
+
+            buffer = bytearray()
+            size = 0
+            for i in order:
+                buffer += codec.encode(items[i][field])
+                if len(buffer) >= _WRITE_BUFFER_SIZE:
+                    size += len(buffer)
+                    fileobj.write(buffer)
+                    buffer.clear()
+            size += len(buffer)
+            buffer += bytes(-size % 8)
+            fileobj.write(buffer)
+
+    def close(self):
+        '''Unmaps the file.'''
+        self._keys.release()
+        self._values.release()
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        '''Returns the number of elements in the tree.'''
+        return self._count
+
+    def _find(self, key):
+        '''Returns the Eytzinger index of key, or 0 if key is not in the tree.'''
+        keys = self._keys
+        count = self._count
+        k = 1
+        while k <= count:
+            current = keys[k - 1]
+            if current == key:
+                return k
+            k = 2 * k + (current < key)
+        return 0
+
+    def __getitem__(self, key):
+        '''
+        Gets the value at key.
+
+        @param Key Key to locate in the tree.
+
+        @return value at key.
+
+        @throws IndexError if key is not present in the tree
+        '''
+        k = self._find(key)
+        if k == 0:
+            raise IndexError(f'! Key {key} not present in Tree !')
+        return self._values[k - 1]
+
+    def get(self, key, default_value):
+        '''
+        Gets the value at key.
+
+        @param Key Key to locate in the tree.
+
+        @return value at key, or default value if key is not found.
+        '''
+        k = self._find(key)
+        return default_value if k == 0 else self._values[k - 1]
+
+    def get_min_key(self):
+        '''Returns the key with the minimum value.'''
+        if self._count == 0:
+            return None
+        return self._keys[(1 << (self._count.bit_length() - 1)) - 1]
+
+    def get_max_key(self):
+        '''Returns the key with the maximum value'''
+        if self._count == 0:
+            return None
+        k = 1
+        while 2 * k + 1 <= self._count:
+            k = 2 * k + 1
+        return self._keys[k - 1]
+
+    def floor(self, key):
+        '''
+        Returns the key/value pair with the greatest key less than or equal to
+        key, or None if there is no such key.
+        '''
+        keys = self._keys
+        count = self._count
+        k = 1
+        while k <= count:
+            k = 2 * k + (not key < keys[k - 1])
+        # The answer is where the search last went right
+        k >>= _trailing_zeros(k) + 1
+        return self._item(k)
+
+    def ceiling(self, key):
+        '''
+        Returns the key/value pair with the least key greater than or equal to
+        key, or None if there is no such key.
+        '''
+        keys = self._keys
+        count = self._count
+        k = 1
+        while k <= count:
+            k = 2 * k + (keys[k - 1] < key)
+        # The answer is where the search last went left
+        k >>= _trailing_ones(k) + 1
+        return self._item(k)
+
+    def _item(self, k):
+        '''Returns the key/value pair at Eytzinger index k, or None if k is 0.'''
+        if k == 0:
+            return None
+        return (self._keys[k - 1], self._values[k - 1])
+
+    def __iter__(self):
+        '''Iterates the key/value pairs in natural order.'''
+        count = self._count
+        if count == 0:
+            return
+        k = 1 << (count.bit_length() - 1)
+        while k != 0:
+            yield (self._keys[k - 1], self._values[k - 1])
+            if 2 * k + 1 <= count:
+                # Successor is the leftmost node of the right subtree
+                k = 2 * k + 1
+                while 2 * k <= count:
+                    k = 2 * k
+            else:
+                k >>= _trailing_ones(k) + 1
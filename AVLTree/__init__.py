@@ -1 +1,6 @@
-from .AVLTree import AVLTree, AVLTreeTraversalMethod
\ No newline at end of file
+from .AVLTree import AVLTree, AVLTreeTraversalMethod
+from .AVLIntervalTree import AVLIntervalTree
+from .AVLMultiTree import AVLMultiTree
+from .AVLTypedTree import AVLTypedTree
+from .ConcurrentAVLTree import ConcurrentAVLTree
+from .FrozenAVLTree import FrozenAVLTree
@@ -0,0 +1,452 @@
+'''Script for measuring the performance of the AVL Tree'''
+
+from AVLTree import AVLTree, AVLTreeTraversalMethod, AVLIntervalTree, AVLMultiTree, ConcurrentAVLTree
+from dataclasses import dataclass
+from operator import attrgetter
+import io
+import random
+import threading
+import time
+import tracemalloc
+
+
+def timed(function):
+    '''Runs function once and returns the elapsed wall time in seconds.'''
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def per_key_insert(tree, batch):
+    '''Inserts the batch into the tree one key at a time.'''
+    for key, value in batch:
+        tree[key] = value
+
+
+print('Batch Update Benchmark:')
+print(f'{"tree size":>10} {"batch size":>10} {"per key (s)":>12} {"update (s)":>12} {"speedup":>8}')
+
+random.seed(1)
+for tree_size in (10000, 100000):
+    base = sorted((random.random(), i) for i in range(tree_size))
+    for batch_size in (100, 1000, 10000, 100000):
+        batch = [(random.random(), i) for i in range(batch_size)]
+
+        tree = AVLTree.from_sorted(base)
+        per_key = timed(lambda: per_key_insert(tree, batch))
+
+        tree = AVLTree.from_sorted(base)
+        update = timed(lambda: tree.update(batch))
+
+        print(f'{tree_size:>10} {batch_size:>10} {per_key:>12.4f} {update:>12.4f} {per_key / update:>7.2f}x')
+
+print('\n')
+
+print('Concurrent Read Throughput Benchmark:')
+print(f'{"threads":>10} {"reads/s":>12}')
+
+tree = ConcurrentAVLTree.from_sorted((i, i) for i in range(100000))
+reads_per_thread = 20000
+
+
+def reader(seed):
+    '''Looks up random keys in the shared tree.'''
+    keys = random.Random(seed)
+    for i in range(reads_per_thread):
+        tree.get(keys.randrange(100000), None)
+
+
+for thread_count in (1, 2, 4, 8, 16):
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f'{thread_count:>10} {thread_count * reads_per_thread / elapsed:>12.0f}')
+
+print('\n')
+
+print('Save and Reload Benchmark:')
+print(f'{"tree size":>10} {"top down (s)":>13} {"dump (s)":>10} {"load (s)":>10}')
+
+for tree_size in (10000, 100000):
+    tree = AVLTree.from_sorted((i, float(i)) for i in range(tree_size))
+
+    def top_down_reload():
+        tree.traversal_method = AVLTreeTraversalMethod.TOP_DOWN
+        reloaded = AVLTree()
+        for key, value in tree:
+            reloaded[key] = value
+        tree.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+
+    top_down = timed(top_down_reload)
+    fileobj = io.BytesIO()
+    dump = timed(lambda: tree.dump(fileobj))
+    fileobj.seek(0)
+    load = timed(lambda: AVLTree.load(fileobj))
+    print(f'{tree_size:>10} {top_down:>13.4f} {dump:>10.4f} {load:>10.4f}')
+
+print('\n')
+
+class CountedKey():
+    '''Integer key that counts the comparisons made against it.'''
+
+    comparisons = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        CountedKey.comparisons += 1
+        return self.value < other.value
+
+    def __gt__(self, other):
+        CountedKey.comparisons += 1
+        return self.value > other.value
+
+    def __eq__(self, other):
+        CountedKey.comparisons += 1
+        return self.value == other.value
+
+    def __ne__(self, other):
+        CountedKey.comparisons += 1
+        return self.value != other.value
+
+
+def counted(function):
+    '''Runs function once and returns the wall time and the comparisons made.'''
+    CountedKey.comparisons = 0
+    elapsed = timed(function)
+    return elapsed, CountedKey.comparisons
+
+
+def per_key_get(tree, batch):
+    '''Looks up the batch one key at a time.'''
+    return [tree.get(key, None) for key in batch]
+
+
+def per_key_remove(tree, batch):
+    '''Removes the batch one key at a time.'''
+    return [tree.remove(key) for key in batch]
+
+
+print('Batch Lookup and Remove Benchmark:')
+print(f'{"operation":>10} {"batch size":>10} {"loop (s)":>10} {"loop cmp":>10} {"batch (s)":>10} {"batch cmp":>10}')
+
+random.seed(1)
+tree_size = 100000
+base = [(CountedKey(i), i) for i in range(tree_size)]
+for batch_size in (100, 1000, 10000, 50000):
+    batch = [CountedKey(k) for k in random.sample(range(tree_size), batch_size)]
+
+    tree = AVLTree.from_sorted(base, check=False)
+    loop, loop_comparisons = counted(lambda: per_key_get(tree, batch))
+    many, many_comparisons = counted(lambda: tree.get_many(batch))
+    print(f'{"get":>10} {batch_size:>10} {loop:>10.4f} {loop_comparisons:>10} {many:>10.4f} {many_comparisons:>10}')
+
+    tree = AVLTree.from_sorted(base, check=False)
+    loop, loop_comparisons = counted(lambda: per_key_remove(tree, batch))
+    tree = AVLTree.from_sorted(base, check=False)
+    many, many_comparisons = counted(lambda: tree.remove_many(batch))
+    print(f'{"remove":>10} {batch_size:>10} {loop:>10.4f} {loop_comparisons:>10} {many:>10.4f} {many_comparisons:>10}')
+
+print('\n')
+
+@dataclass(order=True)
+class OrderedRecord():
+    '''Record ordered by its generated comparison methods.'''
+    last: str
+    first: str
+    id: int
+
+
+@dataclass
+class Record():
+    '''Record with no ordering of its own, ordered by a key function.'''
+    last: str
+    first: str
+    id: int
+
+
+def insert_and_get(tree, keys):
+    '''Inserts the keys one at a time, then looks each of them up.'''
+    for key in keys:
+        tree[key] = None
+    for key in keys:
+        tree.get(key, None)
+
+
+print('Key Function Benchmark:')
+print(f'{"keys":>10} {"count":>10} {"natural (s)":>12} {"key func (s)":>12} {"speedup":>8}')
+
+random.seed(1)
+for count in (10000, 100000):
+    pairs = [(random.randrange(1000), random.randrange(1000000)) for _ in range(count)]
+    natural = timed(lambda: insert_and_get(AVLTree(), pairs))
+    keyed = timed(lambda: insert_and_get(AVLTree(key=lambda k: k[0] * 1000000 + k[1]), pairs))
+    print(f'{"tuple":>10} {count:>10} {natural:>12.4f} {keyed:>12.4f} {natural / keyed:>8.2f}')
+
+    names = [(f'last{random.randrange(1000)}', f'first{random.randrange(100)}', i) for i in range(count)]
+    ordered = [OrderedRecord(*name) for name in names]
+    records = [Record(*name) for name in names]
+    natural = timed(lambda: insert_and_get(AVLTree(), ordered))
+    keyed = timed(lambda: insert_and_get(AVLTree(key=attrgetter('last', 'first', 'id')), records))
+    print(f'{"dataclass":>10} {count:>10} {natural:>12.4f} {keyed:>12.4f} {natural / keyed:>8.2f}')
+
+print('\n')
+
+def build(tree, keys):
+    '''Inserts the keys one at a time and returns the tree.'''
+    for key in keys:
+        tree[key] = None
+    return tree
+
+
+def traced_size(function):
+    '''Returns the memory still allocated by the result of function, in bytes.'''
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+print('Typed Key Benchmark:')
+print(f'{"key type":>10} {"engine":>10} {"memory (MB)":>12} {"insert (s)":>12} {"get (s)":>10} {"remove (s)":>12}')
+
+random.seed(1)
+count = 200000
+for key_type in (int, float):
+    keys = [key_type(k) for k in random.sample(range(1 << 40), count)]
+    for engine, make in (('node', AVLTree), ('typed', lambda: AVLTree(key_type=key_type))):
+        memory = traced_size(lambda: build(make(), keys))
+        tree = make()
+        insert = timed(lambda: build(tree, keys))
+        # The first pass lets the typed tree build its sorted key copy
+        per_key_get(tree, keys)
+        get = timed(lambda: per_key_get(tree, keys))
+        remove = timed(lambda: per_key_remove(tree, keys))
+        print(f'{key_type.__name__:>10} {engine:>10} {memory / 1e6:>12.1f} {insert:>12.4f} {get:>10.4f} {remove:>12.4f}')
+
+print('\n')
+
+def scan(iterable):
+    '''Consumes iterable and returns the number of entries.'''
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def scan_reversed_iterator(tree):
+    '''Scans the tree in reverse through traversal_method and the iterator classes.'''
+    tree.traversal_method = AVLTreeTraversalMethod.REVERSE_ORDER
+    scan(tree)
+    tree.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+
+
+print('Full Scan Benchmark:')
+print(f'{"scan":>16} {"time (s)":>10} {"entries/s":>12}')
+
+count = 500000
+tree = AVLTree.from_sorted((k, k) for k in range(count))
+for name, function in (('iterator', lambda: scan(tree)),
+                       ('reverse iterator', lambda: scan_reversed_iterator(tree)),
+                       ('items()', lambda: scan(tree.items())),
+                       ('keys()', lambda: scan(tree.keys())),
+                       ('values()', lambda: scan(tree.values())),
+                       ('reversed(keys())', lambda: scan(reversed(tree.keys())))):
+    elapsed = min(timed(function) for _ in range(3))
+    print(f'{name:>16} {elapsed:>10.4f} {count / elapsed:>12.0f}')
+
+print('\n')
+
+print('Stats Benchmark:')
+print(f'{"inserts":>10} {"stats":>6} {"insert (s)":>12} {"single rot":>11} {"double rot":>11} {"retrace":>9} {"comparisons":>12}')
+
+random.seed(1)
+count = 100000
+shuffled = random.sample(range(count), count)
+for name, keys in (('sorted', list(range(count))), ('random', shuffled)):
+    for stats in (False, True):
+        tree = AVLTree()
+        if stats:
+            tree.enable_stats()
+        insert = timed(lambda: build(tree, keys))
+        counters = tree.stats() or {}
+        print(f'{name:>10} {"on" if stats else "off":>6} {insert:>12.4f} {counters.get("single_rotations", "-"):>11} '
+              f'{counters.get("double_rotations", "-"):>11} {counters.get("retrace_steps", "-"):>9} {counters.get("comparisons", "-"):>12}')
+
+print('\n')
+
+def remove_all(tree, keys):
+    '''Removes the keys one at a time.'''
+    for key in keys:
+        tree.remove(key)
+
+
+print('Write Throughput Benchmark:')
+print(f'{"operation":>14} {"writes/s":>10} {"path length":>12} {"retraced":>9}')
+
+random.seed(1)
+count = 200000
+shuffled = random.sample(range(count), count)
+for name, prepare, write in (('random insert', AVLTree, lambda tree: build(tree, shuffled)),
+                             ('sorted insert', AVLTree, lambda tree: build(tree, range(count))),
+                             ('remove', lambda: AVLTree.from_sorted((k, k) for k in range(count)), lambda tree: remove_all(tree, shuffled))):
+    tree = prepare()
+    elapsed = timed(lambda: write(tree))
+    # Retracing stops once a height is unchanged, so it visits a few nodes
+    # per write rather than the whole search path
+    tree = prepare()
+    tree.enable_stats()
+    write(tree)
+    counters = tree.stats()
+    searches = sum(counters['path_lengths'].values())
+    path = sum(length * times for length, times in counters['path_lengths'].items()) / searches
+    print(f'{name:>14} {count / elapsed:>10.0f} {path:>12.1f} {counters["retrace_steps"] / searches:>9.1f}')
+
+print('\n')
+
+def add_list_values(tree, pairs):
+    '''Stores duplicate keys by hand, as list values.'''
+    for key, value in pairs:
+        values = tree.get(key, [])
+        values.append(value)
+        tree[key] = values
+
+
+def add_multi(tree, pairs):
+    '''Adds the pairs to an AVLMultiTree.'''
+    for key, value in pairs:
+        tree.add(key, value)
+
+
+print('Multi Tree Benchmark:')
+print(f'{"entries":>10} {"keys":>8} {"list values (s)":>16} {"add (s)":>10} {"speedup":>8}')
+
+random.seed(1)
+for entries, distinct in ((100000, 1000), (100000, 100000)):
+    pairs = [(random.randrange(distinct), i) for i in range(entries)]
+    by_hand = timed(lambda: add_list_values(AVLTree(), pairs))
+    multi = timed(lambda: add_multi(AVLMultiTree(), pairs))
+    print(f'{entries:>10} {distinct:>8} {by_hand:>16.4f} {multi:>10.4f} {by_hand / multi:>8.2f}')
+
+print('\n')
+
+def build_valued(tree, keys):
+    '''Inserts the keys one at a time, each as its own value, and returns the tree.'''
+    for key in keys:
+        tree[key] = key
+    return tree
+
+
+def sum_range(tree, ranges):
+    '''Sums the values of each range by iterating it.'''
+    for low, high in ranges:
+        sum(value for key, value in tree.irange(low, high))
+
+
+def reduce_range(tree, ranges):
+    '''Sums the values of each range with the subtree aggregates.'''
+    for low, high in ranges:
+        tree.reduce(low, high)
+
+
+print('Aggregate Benchmark:')
+print(f'{"tree size":>10} {"range":>8} {"insert (s)":>11} {"+sum (s)":>9} {"irange (s)":>11} {"reduce (s)":>11} {"speedup":>8}')
+
+random.seed(1)
+count = 100000
+shuffled = random.sample(range(count), count)
+plain = timed(lambda: build_valued(AVLTree(), shuffled))
+summed = AVLTree(aggregate='sum')
+aggregated = timed(lambda: build_valued(summed, shuffled))
+for width in (100, 10000):
+    starts = [random.randrange(count - width) for _ in range(200)]
+    ranges = [(start, start + width) for start in starts]
+    iterated = timed(lambda: sum_range(summed, ranges))
+    reduced = timed(lambda: reduce_range(summed, ranges))
+    print(f'{count:>10} {width:>8} {plain:>11.4f} {aggregated:>9.4f} {iterated:>11.4f} {reduced:>11.4f} {iterated / reduced:>8.1f}')
+
+print('\n')
+
+def scan_stabbing(tree, points):
+    '''Finds the windows holding each point by scanning every window.'''
+    for point in points:
+        [item for item in tree.items() if item[0][0] <= point < item[0][1]]
+
+
+def interval_stabbing(tree, points):
+    '''Finds the intervals holding each point with the max end augmentation.'''
+    for point in points:
+        list(tree.at(point))
+
+
+print('Interval Tree Benchmark:')
+print(f'{"intervals":>10} {"build (s)":>10} {"scan (s)":>10} {"stab (s)":>10} {"stabs/s":>10} {"speedup":>8}')
+
+random.seed(1)
+for count in (10000, 100000):
+    windows = sorted((start, start + random.randrange(1, 100), None) for start in random.sample(range(10 * count), count))
+    points = [random.randrange(10 * count) for _ in range(100)]
+    scanned = AVLTree.from_sorted(((start, end), value) for start, end, value in windows)
+    built = timed(lambda: AVLIntervalTree.from_sorted(windows))
+    intervals = AVLIntervalTree.from_sorted(windows)
+    scan_time = timed(lambda: scan_stabbing(scanned, points))
+    stab_time = timed(lambda: interval_stabbing(intervals, points))
+    print(f'{count:>10} {built:>10.4f} {scan_time:>10.4f} {stab_time:>10.4f} {len(points) / stab_time:>10.0f} {scan_time / stab_time:>8.0f}')
+
+print('\n')
+
+def prune_by_hand(tree, keys, capacity):
+    '''Keeps the tree at capacity with get_min_key and remove after each insert.'''
+    for key in keys:
+        tree[key] = key
+        if len(tree) > capacity:
+            tree.remove(tree.get_min_key())
+
+
+def expire_by_hand(tree, cutoff):
+    '''Removes the keys less than cutoff one at a time.'''
+    while len(tree) > 0 and tree.get_min_key() < cutoff:
+        tree.remove(tree.get_min_key())
+
+
+print('Bounded Tree Benchmark:')
+print(f'{"operation":>12} {"entries":>10} {"by hand (s)":>12} {"bounded (s)":>12} {"speedup":>8}')
+
+random.seed(1)
+count = 200000
+keys = [i + random.randrange(1000) for i in range(count)]
+for capacity in (1000, 100000):
+    by_hand = timed(lambda: prune_by_hand(AVLTree(), keys, capacity))
+    bounded = timed(lambda: build_valued(AVLTree(max_size=capacity), keys))
+    print(f'{"insert":>12} {capacity:>10} {by_hand:>12.4f} {bounded:>12.4f} {by_hand / bounded:>8.2f}')
+for expired in (1000, 100000):
+    tree = AVLTree.from_sorted((k, k) for k in range(count))
+    by_hand = timed(lambda: expire_by_hand(tree, expired))
+    tree = AVLTree.from_sorted((k, k) for k in range(count))
+    split = timed(lambda: tree.expire_until(expired))
+    print(f'{"expire":>12} {expired:>10} {by_hand:>12.4f} {split:>12.6f} {by_hand / split:>8.0f}')
+
+print('\n')
+
+print('Range Removal Benchmark:')
+print(f'{"removed":>10} {"remove (s)":>11} {"remove_many (s)":>16} {"remove_range (s)":>17} {"speedup":>8}')
+
+count = 200000
+for removed in (1000, 100000):
+    cutoff = list(range(removed))
+    tree = AVLTree.from_sorted((k, k) for k in range(count))
+    one_by_one = timed(lambda: remove_all(tree, cutoff))
+    tree = AVLTree.from_sorted((k, k) for k in range(count))
+    batched = timed(lambda: tree.remove_many(cutoff))
+    tree = AVLTree.from_sorted((k, k) for k in range(count))
+    ranged = timed(lambda: tree.remove_range(None, removed))
+    print(f'{removed:>10} {one_by_one:>11.4f} {batched:>16.4f} {ranged:>17.6f} {one_by_one / ranged:>8.0f}')
+
+print('\n')
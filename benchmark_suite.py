@@ -0,0 +1,270 @@
+'''
+Reproducible benchmark suite for the AVL Tree.
+
+Times every core operation of an AVLTree, and of a dict plus a bisect
+maintained sorted list as a baseline, at several sizes and key types. Reports
+operations per second, peak memory and tree height, as a table or as JSON for
+tracking results between releases.
+
+    python benchmark_suite.py
+    python benchmark_suite.py --sizes 1000 10000 100000 1000000 10000000 --json results.json
+'''
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left, insort
+from AVLTree import AVLTree, AVLTreeTraversalMethod
+
+OPERATIONS = ('insert_random', 'insert_sorted', 'insert_reverse', 'lookup_hit', 'lookup_miss',
+              'remove', 'min_max', 'in_order', 'reverse_order', 'top_down')
+
+
+def make_keys(key_type, size, rng):
+    '''
+    Returns size distinct keys in random order, and size keys that are not
+    among them, of the given key type.
+    '''
+    numbers = rng.sample(range(size * 4), size)
+    present = [2 * n for n in numbers]
+    missing = [2 * n + 1 for n in numbers]
+    match key_type:
+        case 'int':
+            return present, missing
+        case 'str':
+            return [f'key{n:012d}' for n in present], [f'key{n:012d}' for n in missing]
+        case 'tuple':
+            return [(n % 1000, n) for n in present], [(n % 1000, n) for n in missing]
+    raise ValueError(f'! Unknown key type {key_type} !')
+
+
+class AVLTreeEngine():
+    '''Runs the operations against an AVLTree.'''
+
+    name = 'AVLTree'
+
+    def __init__(self):
+        self.tree = AVLTree()
+
+    def insert(self, keys):
+        tree = self.tree
+        for key in keys:
+            tree[key] = key
+
+    def lookup(self, keys):
+        tree = self.tree
+        for key in keys:
+            tree.get(key, None)
+
+    def remove(self, keys):
+        tree = self.tree
+        for key in keys:
+            tree.remove(key)
+
+    def min_max(self, times):
+        tree = self.tree
+        for _ in range(times):
+            tree.get_min_key()
+            tree.get_max_key()
+
+    def traverse(self, method):
+        self.tree.traversal_method = method
+        for _ in self.tree:
+            pass
+        self.tree.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+        return True
+
+    def height(self):
+        return self.tree.height
+
+
+class DictBisectEngine():
+    '''Runs the operations against a dict plus a sorted list kept with bisect.'''
+
+    name = 'dict+bisect'
+
+    def __init__(self):
+        self.values = {}
+        self.keys = []
+
+    def insert(self, keys):
+        values = self.values
+        ordered = self.keys
+        for key in keys:
+            if key not in values:
+                insort(ordered, key)
+            values[key] = key
+
+    def lookup(self, keys):
+        values = self.values
+        for key in keys:
+            values.get(key, None)
+
+    def remove(self, keys):
+        values = self.values
+        ordered = self.keys
+        for key in keys:
+            if values.pop(key, None) is not None:
+                del ordered[bisect_left(ordered, key)]
+
+    def min_max(self, times):
+        ordered = self.keys
+        for _ in range(times):
+            ordered[0]
+            ordered[-1]
+
+    def traverse(self, method):
+        values = self.values
+        match method:
+            case AVLTreeTraversalMethod.IN_ORDER:
+                for key in self.keys:
+                    values[key]
+            case AVLTreeTraversalMethod.REVERSE_ORDER:
+                for key in reversed(self.keys):
+                    values[key]
+            case _:
+                return False
+        return True
+
+    def height(self):
+        return None
+
+
+def timed(function):
+    '''Runs function once and returns the elapsed wall time in seconds.'''
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def best_time(setup, run, repeat):
+    '''
+    Returns the best of repeat timings of run(engine), each on a fresh engine
+    prepared by setup(), or None if run reports the operation unsupported.
+    '''
+    best = None
+    for _ in range(repeat):
+        engine = setup()
+        result = []
+        elapsed = timed(lambda: result.append(run(engine)))
+        if result[0] is False:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_engine(engine_class, key_type, size, present, missing, repeat):
+    '''Runs every operation for one engine, key type and size, and returns the records.'''
+    ordered = sorted(present)
+
+    def empty():
+        return engine_class()
+
+    def filled():
+        engine = engine_class()
+        engine.insert(present)
+        return engine
+
+    runs = {
+        'insert_random': (empty, lambda engine: engine.insert(present), size),
+        'insert_sorted': (empty, lambda engine: engine.insert(ordered), size),
+        'insert_reverse': (empty, lambda engine: engine.insert(reversed(ordered)), size),
+        'lookup_hit': (filled, lambda engine: engine.lookup(present), size),
+        'lookup_miss': (filled, lambda engine: engine.lookup(missing), size),
+        'remove': (filled, lambda engine: engine.remove(present), size),
+        'min_max': (filled, lambda engine: engine.min_max(size), 2 * size),
+        'in_order': (filled, lambda engine: engine.traverse(AVLTreeTraversalMethod.IN_ORDER), size),
+        'reverse_order': (filled, lambda engine: engine.traverse(AVLTreeTraversalMethod.REVERSE_ORDER), size),
+        'top_down': (filled, lambda engine: engine.traverse(AVLTreeTraversalMethod.TOP_DOWN), size),
+    }
+
+    records = []
+    for operation in OPERATIONS:
+        setup, run, count = runs[operation]
+        seconds = best_time(setup, run, repeat)
+        records.append({
+            'engine': engine_class.name,
+            'key_type': key_type,
+            'size': size,
+            'operation': operation,
+            'operations': count,
+            'seconds': seconds,
+            'ops_per_sec': None if seconds is None else count / seconds,
+        })
+
+    # Memory and height of a tree built by random inserts, traced separately
+    # because tracing slows the timed runs down
+    tracemalloc.start()
+    engine = engine_class()
+    engine.insert(present)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for record in records:
+        record['peak_memory'] = peak
+        record['height'] = engine.height()
+    return records
+
+
+def print_header():
+    '''Prints the header of the results table.'''
+    print(f'{"engine":>12} {"keys":>6} {"size":>9} {"operation":>15} {"ops/s":>12} {"peak MB":>9} {"height":>7}')
+
+
+def print_rows(records):
+    '''Prints the records as rows of the results table.'''
+    for record in records:
+        ops = '-' if record['ops_per_sec'] is None else f'{record["ops_per_sec"]:.0f}'
+        height = '-' if record['height'] is None else record['height']
+        print(f'{record["engine"]:>12} {record["key_type"]:>6} {record["size"]:>9} {record["operation"]:>15} '
+              f'{ops:>12} {record["peak_memory"] / 1e6:>9.1f} {height:>7}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the AVL Tree against dict plus bisect.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='tree sizes to run, 10^3 to 10^7 (default: 1000 10000 100000)')
+    parser.add_argument('--key-types', nargs='+', choices=('int', 'str', 'tuple'), default=['int', 'str', 'tuple'],
+                        help='key types to run (default: all)')
+    parser.add_argument('--baseline-limit', type=int, default=100000,
+                        help='largest size to run the dict+bisect baseline at, its inserts are O(n) each (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per operation, the best is kept (default: 1)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the keys (default: 1)')
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON to PATH, - for stdout')
+    args = parser.parse_args(argv)
+
+    records = []
+    if args.json != '-':
+        print_header()
+    for size in args.sizes:
+        for key_type in args.key_types:
+            present, missing = make_keys(key_type, size, random.Random(args.seed))
+            engines = [AVLTreeEngine] + ([DictBisectEngine] if size <= args.baseline_limit else [])
+            for engine_class in engines:
+                records.extend(run_engine(engine_class, key_type, size, present, missing, args.repeat))
+                if args.json != '-':
+                    print_rows(records[-len(OPERATIONS):])
+
+    if args.json is not None:
+        output = {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': records,
+        }
+        if args.json == '-':
+            json.dump(output, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w') as fileobj:
+                json.dump(output, fileobj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
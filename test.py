@@ -1,7 +1,11 @@
 '''Script for testing and verifying proper functionality of the AVL Tree'''
 
-from AVLTree import AVLTree, AVLTreeTraversalMethod
+from AVLTree import AVLTree, AVLTreeTraversalMethod, AVLIntervalTree, AVLMultiTree, AVLTypedTree, ConcurrentAVLTree, FrozenAVLTree
+import io
+import os
 import random
+import tempfile
+import threading
 
 
 tree = AVLTree()
@@ -80,4 +84,620 @@ else:
             stop = True
 
 print('\n')
-    
\ No newline at end of file
+
+print('Sorted Bulk Load Testing:')
+
+tree = AVLTree.from_sorted((k, str(k)) for k in control)
+
+if len(tree) != len(control):
+    print(f'Lengths don\'t match:  control = {len(control)}, tree = {len(tree)}')
+if [item[0] for item in tree] != control:
+    print('Bulk loaded keys don\'t match control')
+if abs(tree.balance_factor) > 1 or tree.height > len(control).bit_length():
+    print(f'Bulk loaded tree is not balanced: height = {tree.height}')
+else:
+    print(f'All {len(tree)} bulk loaded items matched, height = {tree.height}')
+
+tree[control[-1] + 1] = 'one more'
+if tree[control[-1] + 1] != 'one more' or len(tree) != len(control) + 1:
+    print('Insert after bulk load failed')
+
+for bad in ([(1, 'a'), (1, 'b')], [(2, 'a'), (1, 'b')]):
+    try:
+        AVLTree.from_sorted(bad)
+        print(f'Bad input {bad} was not detected')
+    except ValueError as e:
+        print(e)
+
+print('\n')
+
+print('Batch Update Testing:')
+
+tree = AVLTree.from_sorted((k, k) for k in control[::2])
+batch = {k: -k for k in control[::3]}
+tree.update(batch)
+
+expected = {k: k for k in control[::2]}
+expected.update(batch)
+if list(tree) != sorted(expected.items()):
+    print('Batch updated items don\'t match control')
+else:
+    print(f'All {len(tree)} batch updated items matched, height = {tree.height}')
+
+tree.update([(k, 0) for k in range(-20000000, -10000000, 10)])
+if len(tree) != len(expected) + 1000000 or tree.get(-20000000, None) != 0:
+    print('Rebuilding batch update failed')
+
+print('\n')
+
+print('Order Statistics Testing:')
+
+tree = AVLTree.from_sorted((k, k) for k in control)
+OK = True
+for i in range(0, len(control), 997):
+    if tree.select(i) != control[i] or tree.rank(control[i]) != i or tree.peekitem(i) != (control[i], control[i]):
+        print(f'Order statistics don\'t match at i={i}, control[{i}] = {control[i]}')
+        OK = False
+        break
+if tree.peekitem() != (control[-1], control[-1]) or tree.rank(control[-1] + 1) != len(control):
+    print('Order statistics at the end of the tree don\'t match')
+    OK = False
+if OK:
+    print(f'Order statistics matched for {len(tree)} items')
+
+print('\n')
+
+print('Range Iteration Testing:')
+
+low, high = control[len(control) // 3], control[len(control) // 3 + 50]
+expected = [k for k in control if low <= k < high]
+if [item[0] for item in tree[low:high]] != expected:
+    print('Slice items don\'t match control')
+elif [item[0] for item in tree.irange(low, high, inclusive=(False, True), reverse=True)] != [k for k in control if low < k <= high][::-1]:
+    print('Reverse range items don\'t match control')
+else:
+    print(f'All {len(expected)} range items matched')
+
+print('\n')
+
+print('Floor and Ceiling Testing:')
+
+missing = control[100] + 1 if control[101] != control[100] + 1 else control[100]
+checks = [
+    (tree.floor(control[100]), (control[100], control[100])),
+    (tree.floor(missing), (control[100], control[100])),
+    (tree.lower(control[100]), (control[99], control[99])),
+    (tree.ceiling(control[100]), (control[100], control[100])),
+    (tree.higher(control[100]), (control[101], control[101])),
+    (tree.floor(control[0] - 1), None),
+    (tree.higher(control[-1]), None),
+]
+if any(result != expected for result, expected in checks):
+    print(f'Floor and ceiling results don\'t match: {checks}')
+else:
+    print('Floor and ceiling results matched')
+
+print('Pop Min and Max Testing:')
+
+popped = [tree.pop_min() for i in range(10)] + [tree.pop_max() for i in range(10)]
+if [item[0] for item in popped] != control[:10] + control[:-11:-1] or len(tree) != len(control) - 20:
+    print('Popped items don\'t match control')
+else:
+    print(f'All {len(popped)} popped items matched, {len(tree)} items left')
+
+print('\n')
+
+print('Split and Join Testing:')
+
+remaining = [item[0] for item in tree]
+pivot = remaining[len(remaining) // 2]
+left, right = tree.split(pivot)
+if [item[0] for item in left] != remaining[:len(remaining) // 2] or right.get_min_key() != pivot or len(tree) != 0:
+    print('Split items don\'t match control')
+if right._root._owner is not right._token or left._root._owner is not left._token:
+    print('Split halves don\'t own their nodes, writes would copy them')
+
+tree = AVLTree.join(left, right)
+if [item[0] for item in tree] != remaining or abs(tree.balance_factor) > 1:
+    print('Joined items don\'t match control')
+else:
+    print(f'All {len(tree)} split and joined items matched, height = {tree.height}')
+
+print('\n')
+
+print('Set Algebra Testing:')
+
+evens = AVLTree.from_sorted((k, 'even') for k in range(0, 1000, 2))
+threes = AVLTree.from_sorted((k, 'three') for k in range(0, 1000, 3))
+checks = [
+    ([item[0] for item in evens | threes], sorted(set(range(0, 1000, 2)) | set(range(0, 1000, 3)))),
+    ([item[0] for item in evens & threes], list(range(0, 1000, 6))),
+    ([item[0] for item in evens - threes], sorted(set(range(0, 1000, 2)) - set(range(0, 1000, 3)))),
+    ([item[0] for item in evens ^ threes], sorted(set(range(0, 1000, 2)) ^ set(range(0, 1000, 3)))),
+    (evens.union(threes, lambda key, value, other_value: value)[6], 'even'),
+]
+evens |= threes
+checks.append((len(evens), len(checks[0][1])))
+for combine, expected in ((AVLTree.__ior__, 10), (AVLTree.__iand__, 10), (AVLTree.__isub__, 0), (AVLTree.__ixor__, 0)):
+    tens = AVLTree.from_sorted((k, k) for k in range(10))
+    tens = combine(tens, tens)
+    checks.append(([item[0] for item in tens], list(range(expected))))
+if any(result != expected for result, expected in checks):
+    print('Set algebra results don\'t match control')
+else:
+    print('Set algebra results matched')
+
+print('\n')
+
+print('Snapshot Testing:')
+
+live = AVLTree.from_sorted((k, k) for k in range(1000))
+frozen = live.snapshot()
+for k in range(0, 1000, 2):
+    live[k] = -k
+live[1000] = 1000
+live.pop_min()
+
+if list(frozen) != [(k, k) for k in range(1000)]:
+    print('Snapshot changed with the live tree')
+elif len(live) != 1000 or live[2] != -2 or live.get(0, None) is not None:
+    print('Live tree changes were lost')
+else:
+    print(f'Snapshot of {len(frozen)} items unchanged after {len(live)} item live tree changed')
+
+left, right = AVLTree.from_sorted((k, k) for k in range(100)).split(50)
+frozen = right.snapshot()
+joined = AVLTree.join(left, right)
+for k in range(50, 100):
+    joined[k] = 'changed'
+joined.remove(75)
+if list(frozen) != [(k, k) for k in range(50, 100)]:
+    print('Snapshot of a split half changed with the joined tree')
+else:
+    print('Snapshot of a split half unchanged after the joined tree changed')
+
+print('\n')
+
+print('Iterator Invalidation Testing:')
+
+tree = AVLTree.from_sorted((k, k) for k in range(100))
+items = iter(tree)
+next(items)
+tree[1000] = 1000
+try:
+    next(items)
+    print('Iterator did not detect the change to the tree')
+except RuntimeError as e:
+    print(e)
+
+items = iter(tree)
+for item in items:
+    pass
+tree[2000] = 2000
+try:
+    next(items)
+    print('Exhausted iterator did not stop')
+except StopIteration:
+    print('Exhausted iterator stopped after the tree changed')
+except RuntimeError:
+    print('Exhausted iterator doesn\'t stop after the tree changed')
+
+print('Concurrent Tree Testing:')
+
+tree = ConcurrentAVLTree()
+
+
+def concurrent_writer(start):
+    for k in range(start, 20000, 4):
+        tree[k] = k
+
+
+threads = [threading.Thread(target=concurrent_writer, args=(i,)) for i in range(4)]
+for thread in threads:
+    thread.start()
+scans = 0
+while any(thread.is_alive() for thread in threads):
+    keys = [item[0] for item in tree]
+    if keys != sorted(keys):
+        print('Concurrent iteration returned keys out of order')
+    scans += 1
+for thread in threads:
+    thread.join()
+
+if [item[0] for item in tree] != list(range(20000)):
+    print('Concurrent inserts don\'t match control')
+else:
+    print(f'All {len(tree)} concurrent items matched, {scans} scans during inserts')
+
+writer = threading.Thread(target=lambda: tree.update((k, k) for k in range(20000, 200000)))
+writer.start()
+dumps = []
+try:
+    while writer.is_alive() or len(dumps) == 0:
+        buffer = io.BytesIO()
+        tree.dump(buffer)
+        buffer.seek(0)
+        dumps.append(AVLTree.load(buffer))
+except RuntimeError as e:
+    print(f'Dump during concurrent writes failed: {e}')
+writer.join()
+if any(list(dumped.keys()) != list(range(len(dumped))) for dumped in dumps):
+    print('Dumps during concurrent writes don\'t match control')
+
+def growing_writer():
+    for k in range(200000, 300000):
+        tree[k] = k
+
+
+writer = threading.Thread(target=growing_writer)
+writer.start()
+frozen_sizes = []
+try:
+    while writer.is_alive() or len(frozen_sizes) == 0:
+        buffer = io.BytesIO()
+        FrozenAVLTree.write(tree, buffer)
+        frozen_sizes.append(len(buffer.getvalue()))
+except RuntimeError as e:
+    print(f'Freeze during concurrent writes failed: {e}')
+writer.join()
+
+left = ConcurrentAVLTree()
+left.update((k, k) for k in range(10))
+joined = ConcurrentAVLTree.join(left, AVLTree.from_sorted((k, k) for k in range(10, 20)))
+if type(joined) is not ConcurrentAVLTree or list(joined.keys()) != list(range(20)):
+    print('Concurrent tree joined with a plain tree doesn\'t match control')
+
+print('\n')
+
+print('Dump and Load Testing:')
+
+tree = AVLTree.from_sorted((k, str(k)) for k in control)
+fileobj = io.BytesIO()
+tree.dump(fileobj)
+fileobj.seek(0)
+loaded = AVLTree.load(fileobj)
+if list(loaded) != list(tree) or loaded.height != tree.height:
+    print('Loaded items don\'t match control')
+else:
+    print(f'All {len(loaded)} loaded items matched, {len(fileobj.getvalue())} bytes')
+
+print('\n')
+
+print('Frozen Tree Testing:')
+
+tree = AVLTree.from_sorted((k, str(k)) for k in control)
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'frozen.avl')
+    with open(path, 'wb') as fileobj:
+        FrozenAVLTree.write(tree, fileobj)
+
+    with FrozenAVLTree(path) as frozen:
+        if list(frozen) != list(tree):
+            print('Frozen items don\'t match control')
+        elif any(frozen[k] != str(k) for k in control[::101]):
+            print('Frozen lookups don\'t match control')
+        elif frozen.floor(control[10] + 0.5) != tree.floor(control[10] + 0.5) or frozen.ceiling(control[10] + 0.5) != tree.ceiling(control[10] + 0.5):
+            print('Frozen floor and ceiling don\'t match control')
+        else:
+            print(f'All {len(frozen)} frozen items matched')
+
+    # The columns are streamed, no write holds a whole column
+    writes = []
+    class Recorder():
+        def write(self, data):
+            writes.append(len(data))
+    FrozenAVLTree.write(AVLTree.from_sorted((k, str(k) * 10) for k in range(100000)), Recorder())
+    with open(path, 'r+b') as fileobj:
+        fileobj.seek(7)
+        fileobj.write(b'nope!')
+    try:
+        FrozenAVLTree(path)
+        print('Frozen tree with an unknown codec doesn\'t raise')
+    except ValueError:
+        pass
+    if max(writes) > 1 << 17:
+        print(f'Frozen tree column writes of {max(writes)} bytes don\'t stream')
+
+print('\n')
+
+print('Batch Lookup Testing:')
+
+tree = AVLTree.from_sorted((k, k * 2) for k in control)
+queries = control[::50] + [control[-1] + 1, control[0] - 1]
+values, found = tree.get_many(queries, -1, return_mask=True)
+names = AVLTree.from_sorted((k, int(k)) for k in sorted(str(k) for k in control[:1000]))
+if list(values) != [tree.get(k, -1) for k in queries] or list(found) != [True] * (len(queries) - 2) + [False, False]:
+    print('Batch lookup values don\'t match control')
+elif names.get_many(['x', str(control[0])]) != [None, control[0]]:
+    print('Batch lookup of str keys doesn\'t match control')
+else:
+    print(f'All {len(queries)} batch lookups matched')
+
+print('\n')
+
+print('Remove Testing:')
+
+tree = AVLTree.from_sorted((k, k) for k in control)
+removed = [tree.remove(k) for k in control[::7]]
+removed_many = tree.remove_many(control[1::7] + [control[-1] + 1])
+expected = [k for i, k in enumerate(control) if i % 7 > 1]
+if [item[0] for item in removed] != control[::7] or [item[0] for item in removed_many] != control[1::7]:
+    print('Removed items don\'t match control')
+elif [item[0] for item in tree] != expected or len(tree) != len(expected) or abs(tree.balance_factor) > 1:
+    print('Items left after removal don\'t match control')
+else:
+    print(f'All {len(removed) + len(removed_many)} removed items matched, {len(tree)} items left')
+
+print('\n')
+
+print('Key Function Testing:')
+
+tree = AVLTree(key=str.lower)
+for name in ['delta', 'Alpha', 'charlie', 'Bravo', 'echo']:
+    tree[name] = len(name)
+tree['ALPHA'] = 0
+tree.update([('Delta', 1), ('foxtrot', 7)])
+if [item[0] for item in tree] != ['Alpha', 'Bravo', 'charlie', 'delta', 'echo', 'foxtrot']:
+    print('Key function order doesn\'t match control')
+elif tree['alpha'] != 0 or tree.get('DELTA', None) != 1 or tree.floor('c') != ('Bravo', 5):
+    print('Key function lookups don\'t match control')
+elif tree.remove('ECHO') != ('echo', 4) or [item[0] for item in tree.irange('b', 'E')] != ['Bravo', 'charlie', 'delta']:
+    print('Key function removal or range doesn\'t match control')
+else:
+    reverse = AVLTree.from_sorted(((k, k) for k in reversed(control)), key=lambda k: -k)
+    if [item[0] for item in reverse] != control[::-1] or reverse.rank(control[10]) != len(control) - 11:
+        print('Key function bulk load doesn\'t match control')
+    else:
+        print(f'All {len(tree) + len(reverse)} key function items matched')
+
+folded = AVLTree(key=str.lower)
+folded.update([('ALPHA', 1), ('bravo', 2)])
+cased = AVLTree.from_sorted([('Alpha', 3), ('Charlie', 4)])
+mixed = folded | cased
+folded ^= cased
+try:
+    AVLTree.join(AVLTree(key=str.lower), AVLTree())
+    joined = True
+except ValueError:
+    joined = False
+if list(mixed.items()) != [('ALPHA', 3), ('bravo', 2), ('Charlie', 4)] or list(folded.keys()) != ['bravo', 'Charlie']:
+    print('Set algebra of trees with different key functions doesn\'t match control')
+elif joined:
+    print('Join of trees with different key functions wasn\'t rejected')
+
+print('\n')
+
+print('Typed Key Testing:')
+
+typed = AVLTree(key_type=int)
+for k in control:
+    typed[k] = k * 2
+removed = [typed.remove(k) for k in control[::3]]
+expected = [(k, k * 2) for i, k in enumerate(control) if i % 3]
+lookups = [typed.get(k, None) for k in control] + [typed.get(k, None) for k in control]
+if not isinstance(typed, AVLTypedTree) or removed != [(k, k * 2) for k in control[::3]]:
+    print('Typed tree removals don\'t match control')
+elif list(typed) != expected or len(typed) != len(expected) or abs(typed.balance_factor) > 1:
+    print('Typed tree items don\'t match control')
+elif lookups != [None if i % 3 == 0 else k * 2 for i, k in enumerate(control)] * 2:
+    print('Typed tree lookups don\'t match control')
+elif typed.get_min_key() != expected[0][0] or typed.get_max_key() != expected[-1][0]:
+    print('Typed tree min and max don\'t match control')
+else:
+    print(f'All {len(typed)} typed key items matched')
+
+print('\n')
+
+print('View Testing:')
+
+tree = AVLTree.from_sorted((k, str(k)) for k in control)
+tree.traversal_method = AVLTreeTraversalMethod.TOP_DOWN
+top_down = list(tree)
+tree.traversal_method = AVLTreeTraversalMethod.IN_ORDER
+if list(tree.keys()) != control or list(tree.values()) != [str(k) for k in control] or list(tree.items()) != list(tree):
+    print('Views don\'t match control')
+elif list(reversed(tree.keys())) != control[::-1] or list(tree.items(AVLTreeTraversalMethod.REVERSE_ORDER)) != list(reversed(tree.items())):
+    print('Reversed views don\'t match control')
+elif list(tree.items(AVLTreeTraversalMethod.TOP_DOWN)) != top_down or len(tree.keys()) != len(control):
+    print('Top down view doesn\'t match control')
+elif any(k not in tree.keys() or (k, str(k)) not in tree.items() for k in control[::97]) or control[-1] + 1 in tree.keys() or (control[0], '') in tree.items() or str(control[5]) not in tree.values():
+    print('View membership doesn\'t match control')
+else:
+    print(f'All {len(tree.keys())} view items matched')
+
+print('\n')
+
+print('Stats Testing:')
+
+tree = AVLTree()
+timings = []
+tree.enable_stats(lambda operation, seconds: timings.append(operation))
+for k in range(1000):
+    tree[k] = k
+sorted_stats = tree.stats()
+tree.reset_stats()
+for k in orig[:1000]:
+    tree.get(k, None)
+tree.remove(0)
+lookup_stats = tree.stats()
+tree.disable_stats()
+shuffled = AVLTree()
+shuffled.enable_stats()
+for k in orig[:1000]:
+    shuffled[k] = k
+random_stats = shuffled.stats()
+shuffled.reset_stats()
+height = shuffled.height
+shuffled.floor(orig[0])
+floor_stats = shuffled.stats()
+left, right = AVLTree.from_sorted((k, k) for k in range(1000)).split(300)
+right.enable_stats()
+right.update((k, k) for k in range(300))
+if sorted_stats['single_rotations'] == 0 or sorted_stats['double_rotations'] != 0 or sorted_stats['retrace_steps'] == 0:
+    print('Stats of sorted inserts don\'t match control')
+elif sum(lookup_stats['path_lengths'].values()) != 1001 or lookup_stats['comparisons'] < 1001 or max(lookup_stats['path_lengths']) > tree.height + 2:
+    print('Stats of lookups don\'t match control')
+elif not 0 < floor_stats['comparisons'] <= height + 1 or len(floor_stats['path_lengths']) != 0:
+    print('Stats of floor don\'t match control')
+elif right.stats()['comparisons'] == 0 or right.stats()['single_rotations'] + right.stats()['double_rotations'] == 0:
+    print('Stats of a batch update don\'t match control')
+elif random_stats['double_rotations'] == 0 or tree.stats() is not None or type(tree) is not AVLTree:
+    print('Stats of random inserts or disabled stats don\'t match control')
+elif timings.count('setitem') != 1000 or timings.count('get') != 1000 or timings.count('remove') != 1:
+    print('Stats timing hook calls don\'t match control')
+else:
+    print(f'All {len(timings)} stats operations matched')
+
+print('\n')
+
+print('Multi Tree Testing:')
+
+multi = AVLMultiTree()
+bag = AVLMultiTree(bag=True)
+for i, k in enumerate(orig):
+    multi.add(k, i)
+    bag.add(k)
+expected = sorted((k, i) for i, k in enumerate(orig))
+if len(multi) != len(orig) or multi.unique_count != len(control) or list(multi) != expected:
+    print('Multi tree items don\'t match control')
+elif list(bag.keys()) != sorted(orig) or any(bag.count(k) != orig.count(k) for k in control[:100]):
+    print('Bag counts don\'t match control')
+else:
+    discarded = [multi.discard_one(k) for k in control[:100]] + [multi.discard_one(control[-1] + 1)]
+    removed = multi.remove(control[100])
+    expected = sorted(orig)
+    for k in control[:100]:
+        expected.remove(k)
+    expected = [k for k in expected if k != control[100]]
+    if discarded != [True] * 100 + [False] or removed != orig.count(control[100]) or list(multi.keys()) != expected or len(multi) != len(expected):
+        print('Multi tree removals don\'t match control')
+    elif control[101] not in multi.keys() or control[100] in multi.keys() or (control[101], orig.index(control[101])) not in multi.items() or (control[101], -1) in multi.items() or (control[0], None) not in bag.items():
+        print('Multi tree view membership doesn\'t match control')
+    else:
+        print(f'All {len(multi) + len(bag)} multi tree entries matched')
+
+print('\n')
+
+print('Aggregate Testing:')
+
+sums = AVLTree(aggregate='sum')
+counts = AVLTree(aggregate='count')
+minimums = AVLTree(aggregate='min')
+maximums = AVLTree(aggregate='max')
+for k in orig:
+    for aggregate_tree in (sums, counts, minimums, maximums):
+        aggregate_tree[k] = k * 7 % 101
+for k in control[::3]:
+    for aggregate_tree in (sums, counts, minimums, maximums):
+        aggregate_tree.remove(k)
+remaining = control[:]
+del remaining[::3]
+
+mismatched = 0
+ranges = [(None, None)] + [tuple(sorted(random.sample(control, 2))) for _ in range(200)]
+for low, high in ranges:
+    values = [k * 7 % 101 for k in remaining if (low is None or low <= k) and (high is None or k < high)]
+    if sums.reduce(low, high) != sum(values) or counts.reduce(low, high) != len(values) or \
+            minimums.reduce(low, high) != (min(values) if values else None) or \
+            maximums.reduce(low, high) != (max(values) if values else None):
+        mismatched += 1
+if mismatched > 0:
+    print(f'{mismatched} range aggregates don\'t match control')
+elif sums.aggregate != sum(k * 7 % 101 for k in remaining) or sums.reduce(5, 1) != 0:
+    print('Whole tree aggregate doesn\'t match control')
+elif AVLTree.join(AVLTree.from_sorted([(1, 5)], aggregate=(max, 0)), AVLTree.from_sorted([(2, 9)], aggregate=(max, 0))).aggregate != 9:
+    print('Joined pair aggregate doesn\'t match control')
+else:
+    print(f'All {len(ranges)} range aggregates matched')
+
+print('\n')
+
+print('Interval Tree Testing:')
+
+intervals = AVLIntervalTree()
+windows = {}
+for i, k in enumerate(orig):
+    windows[(k, k + 1 + i % 50)] = i
+    intervals.add(k, k + 1 + i % 50, i)
+for start, end in list(windows)[::4]:
+    del windows[(start, end)]
+    intervals.remove(start, end)
+
+mismatched = 0
+points = random.sample(range(control[0] - 10, control[-1] + 60), 200)
+for point in points:
+    expected = sorted((start, end, value) for (start, end), value in windows.items() if start <= point < end)
+    if list(intervals.at(point)) != expected:
+        mismatched += 1
+    expected = sorted((start, end, value) for (start, end), value in windows.items() if start < point + 20 and end > point)
+    if list(intervals.overlap(point, point + 20)) != expected:
+        mismatched += 1
+bulk = AVLIntervalTree.from_sorted(sorted((start, end, value) for (start, end), value in windows.items()))
+if mismatched > 0:
+    print(f'{mismatched} interval queries don\'t match control')
+elif len(intervals) != len(windows) or list(bulk) != list(intervals) or list(bulk.at(points[0])) != list(intervals.at(points[0])):
+    print('Bulk built intervals don\'t match control')
+elif any(list(intervals.overlap(point, point)) != [] or list(intervals.overlap(point + 1, point)) != [] for point in points):
+    print('Empty interval windows don\'t match control')
+else:
+    print(f'All {2 * len(points)} interval queries matched')
+
+print('\n')
+
+print('Bounded Tree Testing:')
+
+evicted = []
+bounded = AVLTree(max_size=100, on_evict=lambda key, value: evicted.append(key))
+for k in orig:
+    bounded[k] = str(k)
+newest = AVLTree(max_size=100, evict='max')
+newest.update((k, str(k)) for k in orig)
+now = [0]
+expiring = AVLTree(evict='ttl', clock=lambda: now[0])
+for i, k in enumerate(orig):
+    now[0] = i
+    expiring[i + k % 50] = k
+expected = sorted(set(i + k % 50 for i, k in enumerate(orig) if i + k % 50 >= now[0]))
+if list(bounded.keys()) != control[-100:] or sorted(set(evicted)) != control[:-100]:
+    print('Bounded tree keys don\'t match control')
+elif list(newest.keys()) != control[:100]:
+    print('Bounded tree keys evicting the maximum don\'t match control')
+elif list(expiring.keys()) != expected:
+    print('Expiring tree keys don\'t match control')
+elif bounded.expire_until(control[-50]) != 50 or list(bounded.keys()) != control[-50:]:
+    print('Keys left after expire_until don\'t match control')
+else:
+    print(f'All {len(bounded) + len(newest) + len(expiring)} bounded tree keys matched')
+
+keys = iter(bounded.keys())
+next(keys)
+if bounded.expire_until(control[-50]) != 0 or list(keys) != control[-49:]:
+    print('Iterator doesn\'t survive an expire_until that removes nothing')
+
+print('\n')
+
+print('Range Removal Testing:')
+
+ranged = AVLTree.from_sorted((k, str(k)) for k in control)
+low, high = control[len(control) // 4], control[len(control) // 2]
+count, removed = ranged.remove_range(low, high, return_items=True)
+expected = [k for k in control if low <= k < high]
+del ranged[:control[10]]
+del ranged[control[-10]:]
+remaining = [k for k in control[10:-10] if not low <= k < high]
+if count != len(expected) or [key for key, value in removed] != expected:
+    print('Removed range doesn\'t match control')
+elif list(ranged.keys()) != remaining or len(ranged) != len(remaining):
+    print('Keys left after range removal don\'t match control')
+elif ranged.remove_range(control[20], control[30], inclusive=(False, True)) != 10 or control[20] not in ranged.keys() or control[30] in ranged.keys():
+    print('Range removal bounds don\'t match control')
+else:
+    print(f'All {len(control)} range removal keys matched')
+
+keys = iter(ranged.keys())
+next(keys)
+del ranged[control[40]:control[40]]
+if ranged.remove_range(control[40], control[41], inclusive=(False, False)) != 0 or list(keys) != list(ranged.keys())[1:]:
+    print('Iterator doesn\'t survive a range removal that removes nothing')
+
+print('\n')